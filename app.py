@@ -1,19 +1,28 @@
 import streamlit as st
+import asyncio
+import json
+import threading
 import uuid
 import logging
+from logging.handlers import RotatingFileHandler
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-from langchain.chat_models import init_chat_model
+from langchain_core.messages import AIMessageChunk
+from langchain_core.globals import set_llm_cache
+from langchain_community.cache import SQLiteCache
 from langgraph.checkpoint.memory import InMemorySaver
 from langgraph.types import Command
 from deepagents import create_deep_agent
 
 from src.agent_builder.prompts import (
     AGENT_BUILDER_WORKFLOW_INSTRUCTIONS,
-    WEB_SEARCH_AGENT_INSTRUCTIONS,
-    CONFIG_MANAGER_AGENT_INSTRUCTIONS,
-    SUBAGENT_DELEGATION_INSTRUCTIONS,
+    config_manager_instructions,
+    subagent_delegation_instructions,
+    web_search_instructions,
 )
 from src.agent_builder.tools import (
     web_search,
@@ -21,23 +30,50 @@ from src.agent_builder.tools import (
     think_tool,
     ask_user_to_provide_info,
 )
-from src.agent_builder.models import AVAILABLE_TOOLS, AgentConfig
-from src.agent_builder.middleware import AgentConfigMiddleware
-from src.agent_builder.agent_single_create import create_agent_from_config
+from src.agent_builder.models import AgentConfig
+from src.agent_builder.middleware import AgentConfigMiddleware, PromptCacheKeyMiddleware
+from src.agent_builder.agent_single_create import (
+    _build_checkpointer,
+    _get_chat_model,
+    create_agent_from_config,
+    prompt_cache_key,
+)
 
 _ = load_dotenv()
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('streamlit_app.log'),
-        logging.StreamHandler()
-    ]
-)
+# LLM response cache shared by every model call in this process
+LLM_CACHE_DB_PATH = ".langchain_cache.db"
+
+
+@st.cache_resource(show_spinner=False)
+def _init_llm_cache():
+    """Install the global LangChain LLM cache once per process."""
+    set_llm_cache(SQLiteCache(database_path=LLM_CACHE_DB_PATH))
+
+
+_init_llm_cache()
+
+# Configure logging. src.utils.logger has already configured the root logger on
+# import, which makes logging.basicConfig a no-op, so the handlers are attached
+# explicitly (once per process, as the script reruns on every interaction).
+@st.cache_resource(show_spinner=False)
+def _init_logging():
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    root = logging.getLogger()
+    for handler in (
+        RotatingFileHandler('streamlit_app.log', maxBytes=10_000_000, backupCount=5),
+        logging.StreamHandler(),
+    ):
+        handler.setFormatter(formatter)
+        root.addHandler(handler)
+
+
+_init_logging()
 logger = logging.getLogger(__name__)
 
+# Per-session cap on chat history kept for display; older entries are dropped
+MAX_CHAT_MESSAGES = 500
+
 # Page config
 st.set_page_config(
     page_title="Agent Builder Demo",
@@ -46,70 +82,49 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
-# Custom CSS
-st.markdown("""
-<style>
-    .main-header {
-        font-size: 2.5rem;
-        font-weight: bold;
-        text-align: center;
-        margin-bottom: 2rem;
-        color: #1f77b4;
-    }
-    .section-header {
-        font-size: 1.5rem;
-        font-weight: bold;
-        margin-bottom: 1rem;
-        color: #2c3e50;
-    }
-    .chat-message {
-        padding: 1rem;
-        border-radius: 0.5rem;
-        margin-bottom: 1rem;
-    }
-    .user-message {
-        background-color: #e3f2fd;
-        margin-left: 2rem;
-    }
-    .agent-message {
-        background-color: #f5f5f5;
-        margin-right: 2rem;
-    }
-    .mock-conversation {
-        background-color: #fff9e6;
-        padding: 1rem;
-        border-radius: 0.5rem;
-        border-left: 4px solid #ffc107;
-        margin-bottom: 0.5rem;
-    }
-    .stButton button {
-        width: 100%;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS, served by Streamlit static file serving (see .streamlit/config.toml) so the
+# browser caches it. The link is re-emitted on every rerun because Streamlit drops elements
+# that a rerun does not write again.
+st.markdown('<link rel="stylesheet" href="app/static/style.css">', unsafe_allow_html=True)
+
+def new_thread_config(kind):
+    """Return a run config whose thread_id is the session base id plus a per-session counter.
+
+    All threads of one browser session share a common prefix, so their checkpoints
+    can be found (or pruned) together in the checkpoint database.
+    """
+    if "session_base_id" not in st.session_state:
+        st.session_state.session_base_id = uuid.uuid4().hex
+        st.session_state.thread_counter = 0
+    st.session_state.thread_counter += 1
+    thread_id = f"{st.session_state.session_base_id}-{kind}-{st.session_state.thread_counter}"
+    return {"configurable": {"thread_id": thread_id}}
+
 
 # Initialize session state
 if "builder_messages" not in st.session_state:
-    st.session_state.builder_messages = [
+    st.session_state.builder_messages = deque([
         {
             "role": "assistant",
             "content": "👋 欢迎使用 Agent Builder！\n\n我可以帮你创建定制化的 AI Agent。请告诉我你想要创建什么样的 Agent，比如：\n- 预约助手\n请描述你的需求，我会帮你一步步构建！！!"
         }
-    ]
+    ], maxlen=MAX_CHAT_MESSAGES)
 if "entrance_messages" not in st.session_state:
-    st.session_state.entrance_messages = []
+    st.session_state.entrance_messages = deque(maxlen=MAX_CHAT_MESSAGES)
 if "mock_conversations" not in st.session_state:
-    st.session_state.mock_conversations = []
+    st.session_state.mock_conversations = deque(maxlen=MAX_CHAT_MESSAGES)
+if "mock_conversations_dropped" not in st.session_state:
+    st.session_state.mock_conversations_dropped = 0
 if "agent_config" not in st.session_state:
     st.session_state.agent_config = None
+if "agent_config_hash" not in st.session_state:
+    st.session_state.agent_config_hash = None
 if "entrance_agent" not in st.session_state:
     st.session_state.entrance_agent = None
-if "builder_agent" not in st.session_state:
-    st.session_state.builder_agent = None
 if "builder_config" not in st.session_state:
-    st.session_state.builder_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    st.session_state.builder_config = new_thread_config("builder")
 if "entrance_config" not in st.session_state:
-    st.session_state.entrance_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    st.session_state.entrance_config = new_thread_config("entrance")
 if "builder_waiting_interrupt" not in st.session_state:
     st.session_state.builder_waiting_interrupt = False
 if "interrupt_data" not in st.session_state:
@@ -120,24 +135,91 @@ if "pending_entrance_input" not in st.session_state:
     st.session_state.pending_entrance_input = None
 
 
-def generate_available_tools_list():
-    """Generate formatted list of available tools from AVAILABLE_TOOLS."""
-    tools_list = []
-    for idx, tool in enumerate(AVAILABLE_TOOLS, 1):
-        tool_name = tool["name"]
-        description = tool["description"]
-        config_required = tool.get("config_required", [])
-        config_info = f"Config required: {', '.join(config_required)}" if config_required else "No config required"
-        tools_list.append(f'{idx}. **{tool_name}**\n   - {description}\n   - {config_info}')
-    return "\n\n".join(tools_list)
+# Single-pass HTML escaping for chat content that preserves newlines
+_HTML_ESCAPE = str.maketrans({"&": "&amp;", "<": "&lt;", ">": "&gt;", "\n": "<br>"})
 
 
-def initialize_builder_agent():
-    """Initialize the agent builder."""
-    if st.session_state.builder_agent is not None:
-        return st.session_state.builder_agent
+def _builder_message_html(msg):
+    """Render a builder chat message as an HTML block."""
+    if msg["role"] == "user":
+        css_class = "user-message"
+        role_icon = "👤"
+    elif msg["role"] == "system":
+        css_class = "agent-message"
+        role_icon = "ℹ️"
+    else:
+        css_class = "agent-message"
+        role_icon = "🤖"
+
+    content = msg["content"].translate(_HTML_ESCAPE)
+    return f'<div class="chat-message {css_class}">{role_icon} <strong>{msg["role"].title()}:</strong><br>{content}</div>'
+
+
+def rebuild_builder_messages_html():
+    """Re-render the cached builder chat HTML and recent-message hashes from the full message list."""
+    messages = st.session_state.builder_messages
+    # One HTML fragment per message, capped like builder_messages so both drop old entries together
+    st.session_state.builder_messages_html = deque(
+        (_builder_message_html(msg) for msg in messages), maxlen=MAX_CHAT_MESSAGES
+    )
+    st.session_state.recent_msg_hashes = deque((hash(msg["content"]) for msg in messages), maxlen=3)
+    st.session_state.builder_messages_version = st.session_state.get("builder_messages_version", 0) + 1
+
+
+def append_builder_message(msg):
+    """Append a message to the builder chat and to its cached HTML."""
+    st.session_state.builder_messages.append(msg)
+    st.session_state.builder_messages_html.append(_builder_message_html(msg))
+    st.session_state.recent_msg_hashes.append(hash(msg["content"]))
+    st.session_state.builder_messages_version += 1
+
+
+def update_last_builder_message(content_suffix):
+    """Append text to the last builder message and re-render only that message."""
+    last_msg = st.session_state.builder_messages[-1]
+    last_msg["content"] += content_suffix
+    st.session_state.builder_messages_html[-1] = _builder_message_html(last_msg)
+    st.session_state.recent_msg_hashes[-1] = hash(last_msg["content"])
+    st.session_state.builder_messages_version += 1
+
+
+def builder_chat_html():
+    """Return the joined builder chat HTML, re-joining only after the history changed."""
+    version, joined = st.session_state.get("builder_chat_html_cache", (None, ""))
+    if version != st.session_state.builder_messages_version:
+        version = st.session_state.builder_messages_version
+        joined = "".join(st.session_state.builder_messages_html)
+        st.session_state.builder_chat_html_cache = (version, joined)
+    return joined
+
+
+if "builder_messages_html" not in st.session_state:
+    rebuild_builder_messages_html()
+
+
+@st.cache_resource(show_spinner=False)
+def _get_builder_checkpointer():
+    """Return the builder's checkpointer, shared across reruns, sessions and agent rebuilds.
+
+    Defaults to the durable SQLite backend so builder threads survive restarts;
+    AGENT_CHECKPOINT_BACKEND overrides it (see _build_checkpointer).
+    """
+    return _build_checkpointer(default_backend="sqlite")
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _build_builder_agent(current_date: str):
+    """Build the agent builder graph once per process and day.
 
-    current_date = datetime.now().strftime("%Y-%m-%d")
+    The web-search prompt embeds today's date, so the graph is keyed on it and
+    rebuilt when the date changes; the checkpointer is shared across rebuilds.
+
+    Args:
+        current_date: Today's date as YYYY-MM-DD
+
+    Returns:
+        Tuple of (agent, checkpointer)
+    """
     max_concurrent_units = 2
     max_iterations = 5
 
@@ -146,26 +228,24 @@ def initialize_builder_agent():
         + "\n\n"
         + "=" * 80
         + "\n\n"
-        + SUBAGENT_DELEGATION_INSTRUCTIONS.format(
-            max_concurrent_units=max_concurrent_units,
-            max_iterations=max_iterations,
-        )
+        + subagent_delegation_instructions(max_concurrent_units, max_iterations)
     )
 
     web_search_agent = {
         "name": "web-search-agent",
         "description": "Delegate web search tasks to find reference information, design patterns, and best practices for agent building.",
-        "system_prompt": WEB_SEARCH_AGENT_INSTRUCTIONS.format(date=current_date),
+        "system_prompt": web_search_instructions(current_date),
         "tools": [web_search, fetch_webpage_content, think_tool],
     }
 
     config_manager_agent_instance = create_deep_agent(
-        model=init_chat_model(model="openai:o3"),
-        system_prompt=CONFIG_MANAGER_AGENT_INSTRUCTIONS.replace(
-            "[[AVAILABLE_TOOLS_LIST]]", generate_available_tools_list()
-        ),
+        model=_get_chat_model("openai:o3"),
+        system_prompt=config_manager_instructions(),
         tools=[],
-        middleware=[AgentConfigMiddleware()],
+        middleware=[
+            AgentConfigMiddleware(),
+            PromptCacheKeyMiddleware(prompt_cache_key(config_manager_instructions())),
+        ],
     )
 
     config_manager_agent = {
@@ -174,25 +254,33 @@ def initialize_builder_agent():
         "runnable": config_manager_agent_instance,
     }
 
-    model = init_chat_model(model="openai:o3")
-    checkpointer = InMemorySaver()
+    checkpointer = _get_builder_checkpointer()
 
     agent = create_deep_agent(
-        model=model,
+        model=_get_chat_model("openai:o3"),
         checkpointer=checkpointer,
         tools=[ask_user_to_provide_info],
         system_prompt=INSTRUCTIONS,
         subagents=[web_search_agent, config_manager_agent],
-        middleware=[AgentConfigMiddleware()],
+        middleware=[AgentConfigMiddleware(), PromptCacheKeyMiddleware(prompt_cache_key(INSTRUCTIONS))],
     )
 
-    st.session_state.builder_agent = agent
+    return agent, checkpointer
+
+
+def initialize_builder_agent():
+    """Initialize the agent builder."""
+    agent, _ = _build_builder_agent(datetime.now().strftime("%Y-%m-%d"))
     return agent
 
 
+# Interrupt payload fields shown to the user, in display order
+_INTERRUPT_PAYLOAD_KEYS = ("tool", "confirm_message", "agent_config")
+
+
 def process_builder_message(user_input, chat_container=None):
     """Process a message in the agent builder with streaming support."""
-    logger.info(f"Processing builder message: {user_input}")
+    logger.info("Processing builder message: %s", user_input)
     agent = initialize_builder_agent()
 
     try:
@@ -200,7 +288,7 @@ def process_builder_message(user_input, chat_container=None):
         if st.session_state.builder_waiting_interrupt:
             logger.info("Resuming from interrupt")
             msg = {"role": "system", "content": "📤 Resuming from interrupt..."}
-            st.session_state.builder_messages.append(msg)
+            append_builder_message(msg)
             if chat_container:
                 display_message_in_container(chat_container, msg)
 
@@ -208,7 +296,8 @@ def process_builder_message(user_input, chat_container=None):
             for chunk in agent.stream(
                 Command(resume=user_input),
                 config=st.session_state.builder_config,
-                stream_mode="updates"
+                stream_mode="updates",
+                durability="sync",
             ):
                 process_stream_chunk_realtime(chunk, chat_container)
 
@@ -217,7 +306,7 @@ def process_builder_message(user_input, chat_container=None):
         else:
             logger.info("Starting agent builder stream")
             msg = {"role": "system", "content": "🤖 Agent Builder is processing..."}
-            st.session_state.builder_messages.append(msg)
+            append_builder_message(msg)
             if chat_container:
                 display_message_in_container(chat_container, msg)
 
@@ -225,13 +314,14 @@ def process_builder_message(user_input, chat_container=None):
             for chunk in agent.stream(
                 {"messages": [{"role": "user", "content": user_input}]},
                 config=st.session_state.builder_config,
-                stream_mode="updates"
+                stream_mode="updates",
+                durability="sync",
             ):
                 process_stream_chunk_realtime(chunk, chat_container)
 
         # Check for interrupts
         state = agent.get_state(st.session_state.builder_config)
-        logger.info(f"Agent state - next: {state.next}")
+        logger.info("Agent state - next: %s", state.next)
 
         # Update state information
         update_state_from_agent(state)
@@ -252,25 +342,25 @@ def process_builder_message(user_input, chat_container=None):
 
             task = state.tasks[0]
             interrupt_item = task.interrupts[0]
-            logger.info(f"Interrupt item type: {type(interrupt_item)}")
+            logger.info("Interrupt item type: %s", type(interrupt_item))
 
             # Get payload from .value attribute
             if hasattr(interrupt_item, 'value'):
                 payload = interrupt_item.value
-                logger.info(f"Payload content: {payload}")
+                logger.info("Payload content: %s", payload)
 
                 if payload and isinstance(payload, dict):
                     # Format the interrupt payload structure
-                    interrupt_parts.append("\n\nInterrupt payload:")
-                    interrupt_parts.append("\n{")
-                    if "tool" in payload:
-                        interrupt_parts.append(f'\n    "tool": "{payload["tool"]}",')
-                    if "confirm_message" in payload:
-                        interrupt_parts.append(f'\n    "confirm_message": "{payload["confirm_message"]}",')
-                    if "agent_config" in payload:
-                        interrupt_parts.append('\n    "agent_config": <AgentConfig object>,')
-                    interrupt_parts.append("\n}")
-                    logger.info(f"Formatted interrupt payload successfully")
+                    shown_payload = {
+                        key: payload[key] if key != "agent_config" else "<AgentConfig object>"
+                        for key in _INTERRUPT_PAYLOAD_KEYS
+                        if key in payload
+                    }
+                    interrupt_parts.append(
+                        "\n\nInterrupt payload:\n"
+                        + json.dumps(shown_payload, ensure_ascii=False, indent=4, default=str)
+                    )
+                    logger.info("Formatted interrupt payload successfully")
                 else:
                     interrupt_parts.append("\n\n(No payload data available)")
                     logger.warning("Payload is not a dict")
@@ -280,49 +370,35 @@ def process_builder_message(user_input, chat_container=None):
 
             interrupt_msg = "".join(interrupt_parts)
             msg = {"role": "assistant", "content": interrupt_msg}
-            st.session_state.builder_messages.append(msg)
-            logger.info(f"Final interrupt message: {interrupt_msg}")
+            append_builder_message(msg)
+            logger.info("Final interrupt message: %s", interrupt_msg)
         else:
             # Get final message
             if state.values.get("messages"):
                 final_msg = state.values["messages"][-1].content
-                if final_msg and final_msg not in [msg["content"] for msg in st.session_state.builder_messages[-3:]]:
-                    st.session_state.builder_messages.append({"role": "assistant", "content": final_msg})
+                if final_msg and hash(final_msg) not in st.session_state.recent_msg_hashes:
+                    append_builder_message({"role": "assistant", "content": final_msg})
 
             # Only show completion if entrance agent was created
             if st.session_state.entrance_agent is not None:
-                st.session_state.builder_messages.append({"role": "system", "content": "✅ Agent Builder completed!"})
+                append_builder_message({"role": "system", "content": "✅ Agent Builder completed!"})
                 logger.info("Agent builder completed")
 
     except Exception as e:
-        logger.error(f"Error in builder: {str(e)}", exc_info=True)
-        st.session_state.builder_messages.append({"role": "assistant", "content": f"❌ Error: {str(e)}"})
+        logger.error("Error in builder: %s", e, exc_info=True)
+        append_builder_message({"role": "assistant", "content": f"❌ Error: {str(e)}"})
 
 
 def display_message_in_container(container, msg):
     """Display a single message in the given container."""
     with container:
-        if msg["role"] == "user":
-            css_class = "user-message"
-            role_icon = "👤"
-        elif msg["role"] == "system":
-            css_class = "agent-message"
-            role_icon = "ℹ️"
-        else:
-            css_class = "agent-message"
-            role_icon = "🤖"
-
-        content = msg["content"].replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
-        st.markdown(
-            f'<div class="chat-message {css_class}">{role_icon} <strong>{msg["role"].title()}:</strong><br>{content}</div>',
-            unsafe_allow_html=True
-        )
+        st.markdown(_builder_message_html(msg), unsafe_allow_html=True)
 
 
 def process_stream_chunk_realtime(chunk, chat_container=None):
     """Process a single chunk from the agent stream and display in real-time."""
     for node_name, node_output in chunk.items():
-        logger.info(f"Processing chunk from node: {node_name}")
+        logger.info("Processing chunk from node: %s", node_name)
 
         if not node_output:
             continue
@@ -344,16 +420,18 @@ def process_stream_chunk_realtime(chunk, chat_container=None):
                 if hasattr(last_msg, "tool_calls") and last_msg.tool_calls:
                     tool_names = [tc.get("name", "unknown") for tc in last_msg.tool_calls]
                     status_parts.append(f"\n🔧 Tool Calls: {', '.join(tool_names)}")
-                    logger.info(f"Tool calls: {tool_names}")
+                    logger.info("Tool calls: %s", tool_names)
 
         # Check for todos
         if "todos" in node_output:
             todos = node_output["todos"]
             if todos:
                 status_parts.append(f"\n✅ TODOs: {len(todos)} items")
-                todo_preview = "\n".join([f"  - [{t.get('status', 'pending')}] {t.get('content', 'N/A')}" for t in todos])
+                todo_preview = "\n".join(
+                    "  - [%s] %s" % (t.get("status", "pending"), t.get("content", "N/A")) for t in todos
+                )
                 status_parts.append(f"\n{todo_preview}")
-                logger.info(f"TODOs updated: {len(todos)} items")
+                logger.info("TODOs updated: %s items", len(todos))
 
         # Check for agent_config updates
         if "agent_config" in node_output:
@@ -368,13 +446,57 @@ def process_stream_chunk_realtime(chunk, chat_container=None):
         # Add to permanent chat history immediately
         status_msg = "".join(status_parts)
         msg = {"role": role, "content": status_msg}
-        st.session_state.builder_messages.append(msg)
+        append_builder_message(msg)
 
         # Display in real-time in the chat container
         if chat_container:
             display_message_in_container(chat_container, msg)
 
 
+def _config_hash(config):
+    """Return a content hash of an AgentConfig or partial config dict."""
+    if hasattr(config, "model_dump_json"):
+        return hash(config.model_dump_json())
+    return hash(json.dumps(config, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def _log_config_diff(old_config, new_config):
+    """Log a per-key comparison of two configs at DEBUG level."""
+    old_config_dict = old_config.model_dump() if hasattr(old_config, "model_dump") else old_config
+    new_config_dict = new_config.model_dump() if hasattr(new_config, "model_dump") else new_config
+    if not (isinstance(old_config_dict, dict) and isinstance(new_config_dict, dict)):
+        return
+
+    logger.debug("Old config name: %s", old_config_dict.get('name'))
+    logger.debug("New config name: %s", new_config_dict.get('name'))
+    logger.debug("Comparing config dictionaries:")
+    logger.debug("  Old config keys: %s", sorted(old_config_dict.keys()))
+    logger.debug("  New config keys: %s", sorted(new_config_dict.keys()))
+
+    # Check each key
+    all_keys = set(old_config_dict.keys()) | set(new_config_dict.keys())
+    for key in sorted(all_keys):
+        old_val = old_config_dict.get(key)
+        new_val = new_config_dict.get(key)
+        if old_val != new_val:
+            logger.debug("  Key '%s' differs:", key)
+            logger.debug("    Old: %.200s", old_val)
+            logger.debug("    New: %.200s", new_val)
+
+
+def agent_config_dict():
+    """Return the current agent config as a dict, dumping it only when the config hash changes."""
+    config = st.session_state.agent_config
+    if config is None:
+        return None
+
+    cached_hash, cached_dict = st.session_state.get("agent_config_dict_cache", (None, None))
+    if cached_hash != st.session_state.agent_config_hash:
+        cached_dict = config.model_dump() if hasattr(config, "model_dump") else config
+        st.session_state.agent_config_dict_cache = (st.session_state.agent_config_hash, cached_dict)
+    return cached_dict
+
+
 def update_state_from_agent(state):
     """Update session state from agent state."""
     logger.info("Updating state from agent")
@@ -384,69 +506,47 @@ def update_state_from_agent(state):
         logger.info("Agent config found in state")
         new_config = state.values["agent_config"]
 
-        # Check if config has changed by comparing serialized versions
-        old_config_dict = None
-        if st.session_state.agent_config is not None:
-            if hasattr(st.session_state.agent_config, "model_dump"):
-                old_config_dict = st.session_state.agent_config.model_dump()
-            else:
-                old_config_dict = st.session_state.agent_config
-
-        new_config_dict = new_config.model_dump() if hasattr(new_config, "model_dump") else new_config
-
-        config_changed = (
-            old_config_dict is None or
-            old_config_dict != new_config_dict
-        )
-
-        logger.info(f"Config changed: {config_changed}")
-        logger.info(f"Old config exists: {old_config_dict is not None}")
-        logger.info(f"New config name: {new_config_dict.get('name') if isinstance(new_config_dict, dict) else 'N/A'}")
-        if old_config_dict:
-            logger.info(f"Old config name: {old_config_dict.get('name') if isinstance(old_config_dict, dict) else 'N/A'}")
-
-            # Detailed comparison
-            if isinstance(old_config_dict, dict) and isinstance(new_config_dict, dict):
-                logger.info("Comparing config dictionaries:")
-                logger.info(f"  Old config keys: {sorted(old_config_dict.keys())}")
-                logger.info(f"  New config keys: {sorted(new_config_dict.keys())}")
-
-                # Check each key
-                all_keys = set(old_config_dict.keys()) | set(new_config_dict.keys())
-                for key in sorted(all_keys):
-                    old_val = old_config_dict.get(key)
-                    new_val = new_config_dict.get(key)
-                    if old_val != new_val:
-                        logger.info(f"  Key '{key}' differs:")
-                        logger.info(f"    Old: {str(old_val)[:200]}")
-                        logger.info(f"    New: {str(new_val)[:200]}")
-
-        if config_changed and old_config_dict:
+        # Compare content hashes first; the per-key diff is only computed for debug logging
+        new_config_hash = _config_hash(new_config)
+        config_changed = new_config_hash != st.session_state.agent_config_hash
+
+        logger.info("Config changed: %s", config_changed)
+        logger.info("Old config exists: %s", st.session_state.agent_config is not None)
+        if config_changed and st.session_state.agent_config is not None:
             logger.info("Config differences detected - will recreate entrance agent")
+            if logger.isEnabledFor(logging.DEBUG):
+                _log_config_diff(st.session_state.agent_config, new_config)
 
         st.session_state.agent_config = new_config
+        st.session_state.agent_config_hash = new_config_hash
 
         # Create or recreate entrance agent if config changed
         if config_changed:
             try:
                 action = "Creating" if st.session_state.entrance_agent is None else "Recreating"
-                logger.info(f"{action} entrance agent")
-                st.session_state.entrance_agent = create_agent_from_config(st.session_state.agent_config)
+                logger.info("%s entrance agent", action)
+                # Entrance replies are streamed with astream, which the sync sqlite/postgres savers do not support
+                st.session_state.entrance_agent = create_agent_from_config(
+                    st.session_state.agent_config,
+                    checkpointer=InMemorySaver(),
+                )
 
                 # Clear entrance messages when recreating agent
                 if action == "Recreating":
                     logger.info("Clearing entrance messages due to agent recreation")
-                    st.session_state.entrance_messages = []
+                    st.session_state.entrance_messages = deque(maxlen=MAX_CHAT_MESSAGES)
+                    # Start a fresh thread for the new agent
+                    st.session_state.entrance_config = new_thread_config("entrance")
 
                 message = "✅ Entrance Agent has been created! You can now chat with it in the right panel." if action == "Creating" else "✅ Entrance Agent has been updated with new configuration! Previous chat history has been cleared."
-                st.session_state.builder_messages.append({
+                append_builder_message({
                     "role": "system",
                     "content": message
                 })
                 logger.info("Entrance agent created successfully")
             except Exception as e:
-                logger.error(f"Failed to create entrance agent: {str(e)}", exc_info=True)
-                st.session_state.builder_messages.append({
+                logger.error("Failed to create entrance agent: %s", e, exc_info=True)
+                append_builder_message({
                     "role": "system",
                     "content": f"⚠️ Failed to create entrance agent: {str(e)}"
                 })
@@ -456,25 +556,34 @@ def update_state_from_agent(state):
     # Update mock conversations
     if state.values.get("mock_conversations"):
         mock_conv = state.values["mock_conversations"]
-        logger.info(f"Mock conversations found: {len(mock_conv) if isinstance(mock_conv, list) else 'unknown'}")
-        logger.info(f"Mock conversations type: {type(mock_conv)}")
-        
+        logger.info("Mock conversations found: %s", len(mock_conv) if isinstance(mock_conv, list) else 'unknown')
+
         if isinstance(mock_conv, list) and len(mock_conv) > 0:
-            logger.info(f"First message type: {type(mock_conv[0])}, has 'type' attr: {hasattr(mock_conv[0], 'type')}")
-            if hasattr(mock_conv[0], 'type'):
-                logger.info(f"First message.type: {mock_conv[0].type}")
-            
+            # Only the newest MAX_CHAT_MESSAGES are kept for display
+            st.session_state.mock_conversations_dropped = max(0, len(mock_conv) - MAX_CHAT_MESSAGES)
+            if st.session_state.mock_conversations_dropped:
+                logger.warning(
+                    "Mock conversations exceed display cap: showing last %s of %s messages",
+                    MAX_CHAT_MESSAGES, len(mock_conv),
+                )
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Mock conversations type: %s", type(mock_conv))
+                logger.debug("First message type: %s, has 'type' attr: %s", type(mock_conv[0]), hasattr(mock_conv[0], 'type'))
+                if hasattr(mock_conv[0], 'type'):
+                    logger.debug("First message.type: %s", mock_conv[0].type)
+
             try:
-                st.session_state.mock_conversations = [
-                    {"role": "User" if msg.type == "human" else "Agent", "content": msg.content}
-                    for msg in mock_conv
-                ]
-                logger.info(f"Mock conversations updated: {len(st.session_state.mock_conversations)} messages")
-                logger.info(f"Sample mock conversation: {st.session_state.mock_conversations[0] if st.session_state.mock_conversations else 'None'}")
+                st.session_state.mock_conversations = deque(
+                    ({"role": "User" if msg.type == "human" else "Agent", "content": msg.content}
+                     for msg in mock_conv),
+                    maxlen=MAX_CHAT_MESSAGES,
+                )
+                logger.info("Mock conversations updated: %s messages", len(st.session_state.mock_conversations))
+                logger.info("Sample mock conversation: %s", st.session_state.mock_conversations[0] if st.session_state.mock_conversations else 'None')
             except Exception as e:
-                logger.error(f"Error updating mock conversations: {str(e)}", exc_info=True)
+                logger.error("Error updating mock conversations: %s", e, exc_info=True)
                 # Fallback: try to handle different message formats
-                st.session_state.mock_conversations = []
+                st.session_state.mock_conversations = deque(maxlen=MAX_CHAT_MESSAGES)
                 for msg in mock_conv:
                     try:
                         if hasattr(msg, 'type') and hasattr(msg, 'content'):
@@ -483,47 +592,91 @@ def update_state_from_agent(state):
                         elif isinstance(msg, dict):
                             st.session_state.mock_conversations.append(msg)
                     except Exception as msg_error:
-                        logger.error(f"Error processing message: {msg_error}")
-                logger.info(f"Mock conversations updated (fallback): {len(st.session_state.mock_conversations)} messages")
+                        logger.error("Error processing message: %s", msg_error)
+                logger.info("Mock conversations updated (fallback): %s messages", len(st.session_state.mock_conversations))
 
     # Update todos for display
     if state.values.get("todos"):
         todos = state.values["todos"]
-        logger.info(f"TODOs found: {len(todos)} items")
+        logger.info("TODOs found: %s items", len(todos))
         if todos and len(st.session_state.builder_messages) > 0:
             # Add todos info to last message if it's a system message
             todo_summary = "\n\n📋 Current TODOs:\n" + "\n".join(
-                [f"- [{t.get('status', 'pending')}] {t.get('content', 'N/A')}" for t in todos[:5]]
+                "- [%s] %s" % (t.get("status", "pending"), t.get("content", "N/A")) for t in todos[:5]
             )
             if st.session_state.builder_messages[-1].get("role") == "system":
-                st.session_state.builder_messages[-1]["content"] += todo_summary
+                update_last_builder_message(todo_summary)
+
+
+async def _stream_entrance_response(user_input, placeholder=None):
+    """Stream the entrance agent's reply token by token into the placeholder."""
+    buffer = ""
+    async for msg_chunk, _metadata in st.session_state.entrance_agent.astream(
+        {"messages": [{"role": "user", "content": user_input}]},
+        config=st.session_state.entrance_config,
+        stream_mode="messages",
+        durability="sync",
+    ):
+        if isinstance(msg_chunk, AIMessageChunk) and isinstance(msg_chunk.content, str) and msg_chunk.content:
+            buffer += msg_chunk.content
+            if placeholder is not None:
+                placeholder.markdown(buffer)
+    return buffer
+
+
+def _run_coroutine(coro):
+    """Run a coroutine to completion from the Streamlit script thread.
+
+    The script thread normally has no event loop, so asyncio.run is used directly.
+    If a loop is already running in this thread, the coroutine runs on a worker
+    thread that carries the script run context, so UI updates still reach the page.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    ctx = get_script_run_ctx()
 
+    def _runner():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return asyncio.run(coro)
 
-def process_entrance_message(user_input):
-    """Process a message in the entrance agent."""
-    logger.info(f"Processing entrance message: {user_input}")
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(_runner).result()
+
+
+def process_entrance_message(user_input, chat_container=None):
+    """Process a message in the entrance agent with streaming output."""
+    logger.info("Processing entrance message: %s", user_input)
 
     if st.session_state.entrance_agent is None:
         st.error("Please create an agent first using the Agent Builder.")
         return
 
     try:
-        logger.info("Invoking entrance agent")
-        result = st.session_state.entrance_agent.invoke(
-            {"messages": [{"role": "user", "content": user_input}]},
-            config=st.session_state.entrance_config
-        )
-
-        agent_response = result["messages"][-1].content
-        logger.info(f"Entrance agent response: {agent_response[:100]}...")
+        logger.info("Streaming entrance agent response")
+        placeholder = None
+        if chat_container:
+            with chat_container:
+                placeholder = st.empty()
+
+        _run_coroutine(_stream_entrance_response(user_input, placeholder))
+
+        # The checkpointed state holds the final answer (streamed tokens may include tool-call turns)
+        state = st.session_state.entrance_agent.get_state(st.session_state.entrance_config)
+        agent_response = state.values["messages"][-1].content
+        logger.info("Entrance agent response: %s...", agent_response[:100])
         st.session_state.entrance_messages.append({"role": "assistant", "content": agent_response})
 
     except Exception as e:
-        logger.error(f"Error in entrance agent: {str(e)}", exc_info=True)
+        logger.error("Error in entrance agent: %s", e, exc_info=True)
         st.session_state.entrance_messages.append({"role": "assistant", "content": f"❌ Error: {str(e)}"})
 
 
 # Main UI
+config_dict = agent_config_dict()
+
 st.markdown('<div class="main-header">🤖 Agent Builder Demo</div>', unsafe_allow_html=True)
 
 # Create three-column layout
@@ -535,23 +688,7 @@ with col_left:
     # Chat container
     builder_chat_container = st.container(height=600)
     with builder_chat_container:
-        for msg in st.session_state.builder_messages:
-            if msg["role"] == "user":
-                css_class = "user-message"
-                role_icon = "👤"
-            elif msg["role"] == "system":
-                css_class = "agent-message"
-                role_icon = "ℹ️"
-            else:
-                css_class = "agent-message"
-                role_icon = "🤖"
-
-            # Escape HTML in content but preserve newlines
-            content = msg["content"].replace("<", "&lt;").replace(">", "&gt;").replace("\n", "<br>")
-            st.markdown(
-                f'<div class="chat-message {css_class}">{role_icon} <strong>{msg["role"].title()}:</strong><br>{content}</div>',
-                unsafe_allow_html=True
-            )
+        st.markdown(builder_chat_html(), unsafe_allow_html=True)
 
         # Streaming messages will be added directly to the container above
 
@@ -569,7 +706,7 @@ with col_left:
 
             if submit_builder and builder_input:
                 # Add user message immediately and rerun to show it
-                st.session_state.builder_messages.append({"role": "user", "content": builder_input})
+                append_builder_message({"role": "user", "content": builder_input})
                 st.session_state.pending_builder_input = builder_input
                 st.rerun()
 
@@ -577,22 +714,20 @@ with col_left:
         st.write("")  # Add spacing to align with input
         if st.button("🔄 Restart", key="restart_builder", use_container_width=True):
             # Clear builder conversation
-            st.session_state.builder_messages = []
+            st.session_state.builder_messages = deque(maxlen=MAX_CHAT_MESSAGES)
+            rebuild_builder_messages_html()
             st.session_state.pending_builder_input = None
             st.session_state.builder_waiting_interrupt = False
             st.session_state.interrupt_data = None
             # Generate new thread_id for fresh conversation
-            st.session_state.builder_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            st.session_state.builder_config = new_thread_config("builder")
             st.rerun()
 
     # Agent Configuration Display
     st.markdown("---")
     if st.session_state.agent_config:
         with st.expander("⚙️ 生成的 Agent 配置", expanded=False):
-            config_data = st.session_state.agent_config
-            if hasattr(config_data, "model_dump"):
-                config_data = config_data.model_dump()
-            st.json(config_data)
+            st.json(config_dict)
     else:
         st.caption("💡 Agent 配置将在生成后显示在这里")
 
@@ -611,10 +746,15 @@ with col_right:
     mock_container = st.container(height=250)
     with mock_container:
         if st.session_state.mock_conversations:
+            if st.session_state.mock_conversations_dropped:
+                st.caption(
+                    f"Showing the last {len(st.session_state.mock_conversations)} messages; "
+                    f"{st.session_state.mock_conversations_dropped} earlier messages are hidden."
+                )
             for msg in st.session_state.mock_conversations:
                 role_icon = "👤" if msg["role"] == "User" else "🤖"
                 st.markdown(
-                    f'<div class="mock-conversation">{role_icon} <strong>{msg["role"]}:</strong><br>{msg["content"]}</div>',
+                    f'<div class="mock-conversation">{role_icon} <strong>{msg["role"]}:</strong><br>{msg["content"].translate(_HTML_ESCAPE)}</div>',
                     unsafe_allow_html=True
                 )
         else:
@@ -638,7 +778,7 @@ with col_right:
                 css_class = "user-message" if msg["role"] == "user" else "agent-message"
                 role_icon = "👤" if msg["role"] == "user" else "🎯"
                 st.markdown(
-                    f'<div class="chat-message {css_class}">{role_icon} <strong>{msg["role"].title()}:</strong><br>{msg["content"]}</div>',
+                    f'<div class="chat-message {css_class}">{role_icon} <strong>{msg["role"].title()}:</strong><br>{msg["content"].translate(_HTML_ESCAPE)}</div>',
                     unsafe_allow_html=True
                 )
 
@@ -665,27 +805,24 @@ with col_right:
         st.write("")  # Add spacing to align with input
         if st.button("🔄 Restart", key="restart_entrance", use_container_width=True, disabled=st.session_state.entrance_agent is None):
             # Clear entrance agent conversation
-            st.session_state.entrance_messages = []
+            st.session_state.entrance_messages = deque(maxlen=MAX_CHAT_MESSAGES)
             st.session_state.pending_entrance_input = None
             # Generate new thread_id for fresh conversation
-            st.session_state.entrance_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+            st.session_state.entrance_config = new_thread_config("entrance")
             st.rerun()
 
     # Process pending input AFTER displaying chat
     if st.session_state.pending_entrance_input:
         user_input = st.session_state.pending_entrance_input
         st.session_state.pending_entrance_input = None
-        process_entrance_message(user_input)
+        process_entrance_message(user_input, entrance_chat_container)
         st.rerun()
 
 # Sidebar with agent config
 with st.sidebar:
     st.header("📋 Agent Configuration")
     if st.session_state.agent_config:
-        config_data = st.session_state.agent_config
-        if hasattr(config_data, "model_dump"):
-            config_data = config_data.model_dump()
-        st.json(config_data)
+        st.json(config_dict)
     else:
         st.info("Agent configuration will appear here after creation.")
 
@@ -1,12 +1,72 @@
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import sqlite3
 import uuid
 import re
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
+from langchain_core.messages import AIMessageChunk
 from langchain_core.tools import tool
 from langchain.chat_models import init_chat_model
 from langchain.agents import create_agent
 from langgraph.checkpoint.memory import InMemorySaver
+from pydantic import BaseModel
 
 from src.utils.logger import logger
-from src.agent_builder.models import AgentConfig
+from src.agent_builder.models import AVAILABLE_TOOL_NAMES, AVAILABLE_TOOLS, AgentConfig
+from src.agent_builder.middleware import HistoryTrimMiddleware, PromptCacheKeyMiddleware
+
+# Characters OpenAI rejects in tool names (after lowercasing)
+_INVALID_TOOL_CHARS = re.compile(r'[^a-z0-9_-]')
+_SPACE_TO_UNDERSCORE = str.maketrans({" ": "_"})
+
+# Separator line for console and log banners
+_SEP = "=" * 80
+
+
+def _canonical_json(obj) -> str:
+    """Encode obj as key-sorted JSON for use as a cache key, using orjson when installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, sort_keys=True, ensure_ascii=False, default=str)
+
+
+def _json_loads(data: str):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+@functools.lru_cache(maxsize=8)
+def _get_chat_model(model_name: str):
+    """Return a shared chat model client for the given model name.
+
+    Skill agents and the main agent reuse one client (and its HTTP connection pool)
+    per model instead of initializing a new one for every agent. Per-agent request
+    options such as prompt_cache_key are set per call by PromptCacheKeyMiddleware.
+
+    Args:
+        model_name: Model identifier understood by init_chat_model
+
+    Returns:
+        The chat model instance
+    """
+    return init_chat_model(model=model_name)
+
+
+def prompt_cache_key(system_prompt: str) -> str:
+    """Derive a stable OpenAI prompt_cache_key from a static system prompt.
+
+    OpenAI caches long prompt prefixes automatically; requests that share a key are
+    routed to the same cache, which raises hit rates for the unchanging system prompt.
+    Pass the key to PromptCacheKeyMiddleware to send it with an agent's model calls.
+    """
+    return "agent-" + hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:16]
 
 
 def sanitize_tool_name(name: str) -> str:
@@ -21,10 +81,10 @@ def sanitize_tool_name(name: str) -> str:
         Sanitized name containing only letters, numbers, underscores, and hyphens
     """
     # Convert to lowercase and replace spaces with underscores
-    sanitized = name.lower().replace(" ", "_")
+    sanitized = name.lower().translate(_SPACE_TO_UNDERSCORE)
 
     # Remove all characters that are not alphanumeric, underscore, or hyphen
-    sanitized = re.sub(r'[^a-z0-9_-]', '', sanitized)
+    sanitized = _INVALID_TOOL_CHARS.sub('', sanitized)
 
     # If the result is empty or starts with a number, prefix with "skill_"
     if not sanitized or sanitized[0].isdigit():
@@ -37,23 +97,103 @@ def sanitize_tool_name(name: str) -> str:
     return sanitized
 
 
-def create_agent_from_config(agent_config: AgentConfig):
+# Tool names from AVAILABLE_TOOLS are known up front, so sanitize them once at import
+_SANITIZED_TOOL_NAMES = {t["name"]: sanitize_tool_name(t["name"]) for t in AVAILABLE_TOOLS}
+
+
+@functools.lru_cache(maxsize=128)
+def _mock_tool_cached(tool_name: str, cfg_key: str):
+    """Create a mock tool that returns a simulated response.
+
+    Cached so a tool shared by several skills is decorated (and its schema built) once.
+
+    Note: tool_name should come from AVAILABLE_TOOLS and already be valid,
+    but we sanitize it anyway for safety.
+
+    Args:
+        tool_name: Tool name from the agent config
+        cfg_key: Canonical JSON encoding of the tool's config
+    """
+    @tool
+    def mock_tool(query: str) -> str:
+        """Mock tool that simulates tool execution.
+
+        Args:
+            query: The query or parameters for this tool
+
+        Returns:
+            Mock response from the tool
+        """
+        return f"[Mock Response from {tool_name}] Successfully processed: {query}"
+
+    # Sanitize tool name to ensure it matches OpenAI's requirements
+    mock_tool.name = _SANITIZED_TOOL_NAMES.get(tool_name) or sanitize_tool_name(tool_name)
+    mock_tool.description = f"Tool: {tool_name}. Config: {_json_loads(cfg_key)}"
+    return mock_tool
+
+
+def _build_checkpointer(default_backend: str = "memory"):
+    """Build the checkpointer selected by the AGENT_CHECKPOINT_BACKEND env var.
+
+    Supported backends:
+        - "memory": in-process InMemorySaver
+        - "sqlite": SqliteSaver at AGENT_CHECKPOINT_SQLITE_PATH (default ".agent_ckpt.db")
+        - "postgres": PostgresSaver at AGENT_CHECKPOINT_POSTGRES_URI
+          (requires langgraph-checkpoint-postgres)
+
+    Args:
+        default_backend: Backend used when AGENT_CHECKPOINT_BACKEND is unset or empty
+
+    Returns:
+        A LangGraph checkpointer instance
+    """
+    backend = (os.getenv("AGENT_CHECKPOINT_BACKEND") or default_backend).strip().lower()
+
+    if backend == "memory":
+        return InMemorySaver()
+
+    if backend == "sqlite":
+        from langgraph.checkpoint.sqlite import SqliteSaver
+
+        path = os.getenv("AGENT_CHECKPOINT_SQLITE_PATH", ".agent_ckpt.db")
+        logger.info("Using SQLite checkpointer at %s", path)
+        return SqliteSaver(sqlite3.connect(path, check_same_thread=False))
+
+    if backend == "postgres":
+        from psycopg import Connection
+        from psycopg.rows import dict_row
+        from langgraph.checkpoint.postgres import PostgresSaver
+
+        uri = os.getenv("AGENT_CHECKPOINT_POSTGRES_URI")
+        if not uri:
+            raise ValueError("AGENT_CHECKPOINT_POSTGRES_URI must be set for the postgres checkpoint backend")
+        conn = Connection.connect(uri, autocommit=True, prepare_threshold=0, row_factory=dict_row)
+        checkpointer = PostgresSaver(conn)
+        checkpointer.setup()
+        logger.info("Using Postgres checkpointer")
+        return checkpointer
+
+    raise ValueError(f"Unknown AGENT_CHECKPOINT_BACKEND: {backend!r}")
+
+
+def create_agent_from_config(agent_config: AgentConfig, checkpointer=None):
     """Create a dynamic agent using Agent as a Tool pattern.
 
     The skill is wrapped as a tool that the main agent can invoke.
 
     Args:
         agent_config: The AgentConfig object containing agent and skill definitions
+        checkpointer: Optional checkpointer; defaults to the env-selected backend
 
     Returns:
         A configured agent with skill agent wrapped as a tool
     """
-    logger.info("\n" + "=" * 80)
+    logger.info("\n%s", _SEP)
     logger.info("🔨 Creating Dynamic Agent from Configuration (Agent as a Tool)")
-    logger.info("=" * 80)
+    logger.info(_SEP)
 
     # Extract config data
-    if isinstance(agent_config, AgentConfig):
+    if isinstance(agent_config, BaseModel):
         config_data = agent_config.model_dump()
     else:
         config_data = agent_config
@@ -63,35 +203,15 @@ def create_agent_from_config(agent_config: AgentConfig):
     system_prompt = config_data.get("system_prompt")
     skills = config_data.get("skills", [])
 
-    logger.info(f"📝 Agent Name: {agent_name}")
-    logger.info(f"📝 Agent Description: {agent_description}")
-    logger.info(f"📝 Skills Count: {len(skills)}")
-
-    # Create skill agent tools
-    skill_agent_tools = []
+    logger.info("📝 Agent Name: %s", agent_name)
+    logger.info("📝 Agent Description: %s", agent_description)
+    logger.info("📝 Skills Count: %s", len(skills))
 
     def create_mock_tool(tool_name: str, tool_config: dict):
-        """Create a mock tool that returns a simulated response.
-
-        Note: tool_name should come from AVAILABLE_TOOLS and already be valid,
-        but we sanitize it anyway for safety.
-        """
-        @tool
-        def mock_tool(query: str) -> str:
-            """Mock tool that simulates tool execution.
-
-            Args:
-                query: The query or parameters for this tool
-
-            Returns:
-                Mock response from the tool
-            """
-            return f"[Mock Response from {tool_name}] Successfully processed: {query}"
-
-        # Sanitize tool name to ensure it matches OpenAI's requirements
-        mock_tool.name = sanitize_tool_name(tool_name)
-        mock_tool.description = f"Tool: {tool_name}. Config: {tool_config}"
-        return mock_tool
+        """Return a mock tool, reusing one instance per (name, config) pair."""
+        # Config values may be nested, so key on canonical JSON rather than dict items
+        cfg_key = _canonical_json(tool_config)
+        return _mock_tool_cached(tool_name, cfg_key)
 
     def create_skill_agent_tool(skill_name: str, skill_when_to_use: str, skill_prompt: str, skill_tools_config: list):
         """Factory function to create skill agent tool with proper closure."""
@@ -100,15 +220,18 @@ def create_agent_from_config(agent_config: AgentConfig):
         for tool_config in skill_tools_config:
             tool_name = tool_config.get("name")
             tool_cfg = tool_config.get("config", {})
+            if tool_name not in AVAILABLE_TOOL_NAMES:
+                logger.warning("        - Tool %r is not in AVAILABLE_TOOLS, mocking it anyway", tool_name)
             mock_tool = create_mock_tool(tool_name, tool_cfg)
             mock_tools.append(mock_tool)
-            logger.info(f"        - Created mock tool: {tool_name}")
+            logger.info("        - Created mock tool: %s", tool_name)
 
         # Create the skill agent with mock tools
         skill_agent = create_agent(
-            model=init_chat_model(model="openai:gpt-4o"),
+            model=_get_chat_model("openai:gpt-4o"),
             tools=mock_tools,
             system_prompt=skill_prompt,
+            middleware=[PromptCacheKeyMiddleware(prompt_cache_key(skill_prompt))],
         )
 
         # Wrap skill agent as a tool
@@ -131,60 +254,59 @@ def create_agent_from_config(agent_config: AgentConfig):
 
         return skill_tool
 
+    # Skills are built sequentially: the schema allows a single skill, and running
+    # an event loop here would fail for callers that already have one
+    skill_agent_tools = []
     for skill in skills:
         skill_name = skill.get("name")
         skill_when_to_use = skill.get("when_to_use")
         skill_prompt = skill.get("prompt")
         skill_tools_config = skill.get("tools", [])
 
-        logger.info(f"\n  🔧 Creating Skill Agent as Tool: {skill_name}")
-        logger.info(f"     - When to use: {skill_when_to_use}")
-        logger.info(f"     - Tools config: {len(skill_tools_config)} tool(s)")
+        logger.info("\n  🔧 Creating Skill Agent as Tool: %s", skill_name)
+        logger.info("     - When to use: %s", skill_when_to_use)
+        logger.info("     - Tools config: %s tool(s)", len(skill_tools_config))
 
         # Create skill agent tool using factory function
         skill_agent_tool = create_skill_agent_tool(skill_name, skill_when_to_use, skill_prompt, skill_tools_config)
 
         skill_agent_tools.append(skill_agent_tool)
-        logger.info(f"     ✅ Skill agent wrapped as tool: {skill_agent_tool.name}")
+        logger.info("     ✅ Skill agent wrapped as tool: %s", skill_agent_tool.name)
 
     # Create the main agent with skill agent tools
-    logger.info(f"\n🚀 Creating main agent: {agent_name}")
-    logger.info(f"   - Available tools: {[t.name for t in skill_agent_tools]}")
+    logger.info("\n🚀 Creating main agent: %s", agent_name)
+    logger.info("   - Available tools: %s", [t.name for t in skill_agent_tools])
 
     dynamic_agent = create_agent(
-        model=init_chat_model(model="openai:gpt-4o"),
+        model=_get_chat_model("openai:gpt-4o"),
         tools=skill_agent_tools,
         system_prompt=system_prompt,
-        checkpointer=InMemorySaver(),
+        checkpointer=checkpointer or _build_checkpointer(),
+        # Only each turn's new user message is sent in; keep the model-facing history bounded
+        middleware=[HistoryTrimMiddleware(), PromptCacheKeyMiddleware(prompt_cache_key(system_prompt))],
     )
 
     logger.info("✅ Dynamic agent created successfully!")
-    logger.info("=" * 80)
+    logger.info(_SEP)
 
     return dynamic_agent
 
 
-if __name__ == "__main__":
-    # Test the function
-    dynamic_agent = create_agent_from_config(agent_config)
-
-    print("\n✅ Dynamic Agent Created Successfully!")
-
-    # Start interactive conversation with the dynamic agent
-    print("\n" + "=" * 80)
-    print("💬 Starting Interactive Conversation")
-    print("=" * 80)
-    agent_name = agent_config.name if hasattr(agent_config, 'name') else agent_config.get('name')
-    print(f"You are now chatting with: {agent_name}")
-    print("Type 'exit' or 'quit' to end the conversation")
-    print("=" * 80 + "\n")
+async def _chat_loop(dynamic_agent, config: dict, agent_name: str) -> None:
+    """Interactive console chat with a dynamic agent, printing tokens as they arrive.
 
-    # Create a new thread for the dynamic agent conversation
-    dynamic_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+    The sync stream is pumped from a worker thread so the loop works with any
+    checkpointer, including sync-only ones such as SqliteSaver.
 
+    Args:
+        dynamic_agent: Agent created by create_agent_from_config
+        config: Run config carrying the conversation thread_id
+        agent_name: Display name used in the console prompt
+    """
+    loop = asyncio.get_running_loop()
     while True:
         try:
-            user_input = input("You: ").strip()
+            user_input = (await loop.run_in_executor(None, input, "You: ")).strip()
 
             if not user_input:
                 continue
@@ -193,20 +315,46 @@ if __name__ == "__main__":
                 print(f"\n👋 Ending conversation with {agent_name}. Goodbye!")
                 break
 
-            # Invoke the dynamic agent
+            # Stream the dynamic agent's reply token by token
             print(f"\n{agent_name}: ", end="", flush=True)
-            result = dynamic_agent.invoke(
+            stream = dynamic_agent.stream(
                 {"messages": [{"role": "user", "content": user_input}]},
-                config=dynamic_config
+                config=config,
+                stream_mode="messages",
             )
-
-            # Print the agent's response
-            response = result["messages"][-1].content
-            print(response + "\n")
-
-        except KeyboardInterrupt:
-            print(f"\n\n👋 Conversation interrupted. Goodbye!")
+            while (item := await asyncio.to_thread(next, stream, None)) is not None:
+                msg_chunk, _metadata = item
+                if isinstance(msg_chunk, AIMessageChunk) and isinstance(msg_chunk.content, str):
+                    print(msg_chunk.content, end="", flush=True)
+            print("\n")
+
+        except EOFError:
+            print(f"\n\n👋 Conversation ended. Goodbye!")
             break
         except Exception as e:
             print(f"\n❌ Error: {e}\n")
-            logger.error(f"Error in dynamic agent conversation: {e}", exc_info=True)
+            logger.error("Error in dynamic agent conversation: %s", e, exc_info=True)
+
+
+if __name__ == "__main__":
+    # Test the function
+    dynamic_agent = create_agent_from_config(agent_config)
+
+    print("\n✅ Dynamic Agent Created Successfully!")
+
+    # Start interactive conversation with the dynamic agent
+    print("\n" + _SEP)
+    print("💬 Starting Interactive Conversation")
+    print(_SEP)
+    agent_name = agent_config.name if hasattr(agent_config, 'name') else agent_config.get('name')
+    print(f"You are now chatting with: {agent_name}")
+    print("Type 'exit' or 'quit' to end the conversation")
+    print(_SEP + "\n")
+
+    # Create a new thread for the dynamic agent conversation
+    dynamic_config = {"configurable": {"thread_id": str(uuid.uuid4())}}
+
+    try:
+        asyncio.run(_chat_loop(dynamic_agent, dynamic_config, agent_name))
+    except KeyboardInterrupt:
+        print(f"\n\n👋 Conversation interrupted. Goodbye!")
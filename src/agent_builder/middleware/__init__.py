@@ -1,5 +1,7 @@
 """Middleware for Agent Builder."""
 
 from src.agent_builder.middleware.agent_config import AgentConfigMiddleware
+from src.agent_builder.middleware.history_trim import HistoryTrimMiddleware
+from src.agent_builder.middleware.prompt_cache import PromptCacheKeyMiddleware
 
-__all__ = ["AgentConfigMiddleware"]
+__all__ = ["AgentConfigMiddleware", "HistoryTrimMiddleware", "PromptCacheKeyMiddleware"]
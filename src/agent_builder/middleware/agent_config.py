@@ -1,17 +1,42 @@
 """Agent Configuration Middleware for managing agent building state."""
 
+import functools
+import sys
 from typing import Any, Dict, Annotated, List
 import re
 
 from langchain.agents.middleware.types import AgentMiddleware, AgentState
-from langchain_core.messages import BaseMessage, ToolMessage, HumanMessage, AIMessage
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
 from langchain_core.tools import tool, InjectedToolArg
 from langgraph.prebuilt.tool_node import ToolRuntime
 from langgraph.types import Command
-from pydantic import ValidationError
+from pydantic import TypeAdapter, ValidationError
 from typing_extensions import TypedDict, NotRequired
 
-from src.agent_builder.models import AgentConfig
+from src.agent_builder.models import AVAILABLE_TOOL_NAMES, AgentConfig
+from src.utils.logger import logger
+
+# Reused validator for merged configs (cheaper per call than AgentConfig(**data))
+_AGENT_CFG_ADAPTER = TypeAdapter(AgentConfig)
+
+# Per-field validators (type plus Field constraints), so a partial update is checked
+# only for the fields it touches
+_FIELD_ADAPTERS = {
+    name: TypeAdapter(Annotated[field.annotation, field])
+    for name, field in AgentConfig.model_fields.items()
+}
+_REQUIRED_FIELDS = frozenset(name for name, field in AgentConfig.model_fields.items() if field.is_required())
+
+# Sentinel for "attribute not present" in no-op update checks
+_MISSING = object()
+
+
+class _ValidatedUpdate(dict):
+    """Config delta whose fields update_agent_config has already validated.
+
+    A plain dict subclass, so it serializes as an ordinary dict; the type only tells
+    the reducer it can apply the values without validating them again.
+    """
 
 
 def _agent_config_reducer(old: AgentConfig | Dict[str, Any] | None, new: AgentConfig | Dict[str, Any] | None) -> AgentConfig | Dict[str, Any] | None:
@@ -22,10 +47,37 @@ def _agent_config_reducer(old: AgentConfig | Dict[str, Any] | None, new: AgentCo
     if isinstance(new, AgentConfig):
         return new
 
+    # Empty or no-op updates leave the current config untouched
+    if not new:
+        return old if old is not None else new
+    if isinstance(old, AgentConfig) and all(getattr(old, key, _MISSING) == value for key, value in new.items()):
+        return old
+
+    if isinstance(new, _ValidatedUpdate):
+        if isinstance(old, AgentConfig):
+            return old.model_copy(update=new)
+        # Partial state is plain data, so dump the validated models before merging
+        new = {key: _FIELD_ADAPTERS[key].dump_python(value) for key, value in new.items()}
+
+    # Patch onto an already valid config: validate only the touched fields, then copy.
+    # AgentConfig has no cross-field validators, so this is equivalent to full validation.
+    if isinstance(old, AgentConfig):
+        try:
+            validated = {
+                key: _FIELD_ADAPTERS[key].validate_python(value)
+                for key, value in new.items()
+                if key in _FIELD_ADAPTERS
+            }
+        except ValidationError:
+            validated = None
+        if validated is not None:
+            return old.model_copy(update=validated)
+
     # If new is a dictionary
     current_data = {}
     if old is not None:
         if isinstance(old, AgentConfig):
+            # Partial state is consumed as plain dicts (skill.get(...)), so dump nested models
             current_data = old.model_dump()
         elif isinstance(old, dict):
             current_data = old
@@ -33,9 +85,13 @@ def _agent_config_reducer(old: AgentConfig | Dict[str, Any] | None, new: AgentCo
     # Merge update
     merged_data = {**current_data, **new}
 
+    # Still missing required fields: keep building the partial dictionary
+    if not _REQUIRED_FIELDS <= merged_data.keys():
+        return merged_data
+
     # Try to convert to AgentConfig if possible
     try:
-        return AgentConfig(**merged_data)
+        return _AGENT_CFG_ADAPTER.validate_python(merged_data)
     except ValidationError:
         # If validation fails (partial state), return as dictionary
         return merged_data
@@ -45,7 +101,7 @@ def _mock_conversations_reducer(old: List[BaseMessage] | None, new: List[BaseMes
     """Reducer for updating mock conversations state."""
     if new is not None:
         return new
-    return old or []
+    return old if old is not None else []
 
 
 class AgentConfigState(AgentState):
@@ -116,10 +172,10 @@ def write_agent_config(
         )
     except ValidationError as e:
         # Return validation errors to the agent
-        error_messages = []
-        for error in e.errors():
-            field = " -> ".join(str(x) for x in error["loc"])
-            error_messages.append(f"  - {field}: {error['msg']}")
+        error_messages = [
+            f"  - {' -> '.join(map(str, error['loc']))}: {error['msg']}"
+            for error in e.errors()
+        ]
 
         return "Configuration validation failed:\n" + "\n".join(error_messages)
 
@@ -172,11 +228,27 @@ def update_agent_config(
     if not isinstance(updates, dict):
         return "Error: updates must be a dictionary"
 
+    # Validate the delta once here so the reducer can apply it without revalidating.
+    # Deltas with fields that don't validate yet (e.g. a half-built skill) or that
+    # AgentConfig doesn't define go through as given and are kept as partial state.
+    unknown_fields = [key for key in updates if key not in _FIELD_ADAPTERS]
+    if unknown_fields:
+        logger.warning("update_agent_config got fields AgentConfig does not define: %s", ", ".join(unknown_fields))
+        state_update = updates
+    else:
+        try:
+            state_update = _ValidatedUpdate(
+                (key, _FIELD_ADAPTERS[key].validate_python(value))
+                for key, value in updates.items()
+            )
+        except ValidationError:
+            state_update = updates
+
     # Return Command to update state
     updated_fields = ", ".join(updates.keys())
     return Command(
         update={
-            "agent_config": updates,
+            "agent_config": state_update,
             "messages": [ToolMessage(
                 content=f"Agent configuration updated: {updated_fields}",
                 tool_call_id=runtime.tool_call_id
@@ -206,54 +278,47 @@ def read_agent_config() -> Dict[str, Any]:
     return {}
 
 
+# Matches one **Role:** turn: the role, then its content up to the next role line or
+# markdown heading. Supports "User", "Agent", "用户", or specific agent names.
+# Possessive quantifiers (stdlib re, Python 3.11+) make failed role matches give up
+# without backtracking on lines full of asterisks.
+_CONV_PATTERN = re.compile(
+    r'^[ \t]*+\*\*(?P<role>[^:*\n]++):\*\*[ \t]*+'
+    r'(?P<content>.*+(?:\n(?![ \t]*+(?:\*\*[^:*\n]++:\*\*|#)).*+)*+)',
+    re.MULTILINE,
+)
+_USER_ROLES = frozenset(("user", "用户"))
+
+# All identifier-style tool names (e.g. knowledge_search) in one alternation, so a
+# conversation is scanned once rather than once per name. Single-word names such as
+# "amazon" are ordinary words in a conversation and are not flagged.
+_FLAGGED_TOOL_NAMES = sorted((n for n in AVAILABLE_TOOL_NAMES if "_" in n), key=lambda n: (-len(n), n))
+_TOOL_NAME_PATTERN = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, _FLAGGED_TOOL_NAMES)) + r")\b",
+    re.IGNORECASE,
+)
+
+
+def find_tool_names(text: str) -> List[str]:
+    """Return the distinct tool names mentioned in text, in order of first appearance."""
+    return list(dict.fromkeys(m.lower() for m in _TOOL_NAME_PATTERN.findall(text)))
+
+
 def parse_mock_conversations(conversation: str) -> List[BaseMessage]:
     """Parse markdown mock conversations into list of messages."""
+    # Normalize Windows/old-Mac line endings so "." never captures a stray "\r"
+    if "\r" in conversation:
+        conversation = conversation.replace("\r\n", "\n").replace("\r", "\n")
+
     messages = []
-    lines = conversation.split('\n')
-    current_role = None
-    current_content = []
-
-    # Regex to match **Role:** pattern, capturing Role and Content
-    # Supports "User", "Agent", "用户", or specific agent names
-    role_pattern = re.compile(r'\*\*(.*?):\*\*\s*(.*)', re.IGNORECASE)
-
-    for line in lines:
-        line = line.strip()
-        if not line:
-            if current_role and current_content:
-                content = "\n".join(current_content)
-                if current_role.lower() in ['user', '用户']:
-                    messages.append(HumanMessage(content=content))
-                else:
-                    # Assume anything else is the Agent
-                    messages.append(AIMessage(content=content))
-                current_content = []
-            continue
-
-        match = role_pattern.match(line)
-
-        if match:
-            # Save previous message if exists
-            if current_role and current_content:
-                content = "\n".join(current_content)
-                if current_role.lower() in ['user', '用户']:
-                    messages.append(HumanMessage(content=content))
-                else:
-                    messages.append(AIMessage(content=content))
-
-            current_role = match.group(1).strip()
-            current_content = [match.group(2).strip()]
-        else:
-            if current_role:
-                current_content.append(line)
-
-    # Add last message
-    if current_role and current_content:
-        content = "\n".join(current_content)
-        if current_role.lower() in ['user', '用户']:
-            messages.append(HumanMessage(content=content))
-        else:
-            messages.append(AIMessage(content=content))
+    for role, content in _CONV_PATTERN.findall(conversation):
+        # Trim surrounding blank lines only, keeping the indentation of the first
+        # content line (e.g. a code block starting on the line after the role)
+        content = content.lstrip("\n").rstrip()
+        if content:
+            # Anything that is not a user role is assumed to be the Agent
+            msg_cls = HumanMessage if role.strip().lower() in _USER_ROLES else AIMessage
+            messages.append(msg_cls(content=content))
 
     return messages
 
@@ -285,6 +350,13 @@ def update_mock_conversation(
     if not isinstance(conversation, str):
         return "Error: conversation must be a string"
 
+    tool_names = find_tool_names(conversation)
+    if tool_names:
+        return (
+            "Error: mock conversation mentions tool names: " + ", ".join(tool_names)
+            + ". Rewrite those turns in natural, user-facing language and call update_mock_conversation again."
+        )
+
     messages = parse_mock_conversations(conversation)
 
     return Command(
@@ -328,6 +400,12 @@ Please select a tool to proceed.
 """
 
 
+@functools.lru_cache(maxsize=128)
+def _composed_prompt(extra: str) -> str:
+    """Return the default prompt with `extra` appended, shared and interned per distinct extra."""
+    return sys.intern(AGENT_CONFIG_SYSTEM_PROMPT + "\n\n" + extra)
+
+
 class AgentConfigMiddleware(AgentMiddleware):
     """Middleware for managing agent configuration during the building process.
 
@@ -341,7 +419,7 @@ class AgentConfigMiddleware(AgentMiddleware):
     - State-based storage (not file-based)
     """
 
-    tools = [write_agent_config, update_agent_config, read_agent_config, update_mock_conversation]
+    tools = (write_agent_config, update_agent_config, read_agent_config, update_mock_conversation)
     system_prompt = AGENT_CONFIG_SYSTEM_PROMPT
     state_schema = AgentConfigState
 
@@ -352,4 +430,4 @@ class AgentConfigMiddleware(AgentMiddleware):
             system_prompt: Optional custom system prompt to append to the default.
         """
         if system_prompt:
-            self.system_prompt = AGENT_CONFIG_SYSTEM_PROMPT + "\n\n" + system_prompt
+            self.system_prompt = _composed_prompt(system_prompt)
@@ -0,0 +1,55 @@
+"""History trimming middleware for dynamic agents."""
+
+from typing import Awaitable, Callable
+
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import trim_messages
+from langchain_core.messages.utils import count_tokens_approximately
+
+# Default token budget for the conversation history sent to the model
+DEFAULT_MAX_HISTORY_TOKENS = 8000
+
+
+class HistoryTrimMiddleware(AgentMiddleware):
+    """Middleware that bounds the message history sent to the model on each call.
+
+    The full conversation stays in the checkpointed state; only the model request
+    is trimmed to the most recent turns that fit in the token budget. The system
+    prompt is carried separately on the request and is never trimmed.
+    """
+
+    def __init__(self, max_tokens: int = DEFAULT_MAX_HISTORY_TOKENS):
+        """Initialize the middleware.
+
+        Args:
+            max_tokens: Approximate token budget for the trimmed message history.
+        """
+        super().__init__()
+        self.max_tokens = max_tokens
+
+    def _trim(self, request: ModelRequest) -> ModelRequest:
+        trimmed = trim_messages(
+            request.messages,
+            max_tokens=self.max_tokens,
+            strategy="last",
+            token_counter=count_tokens_approximately,
+            start_on="human",
+        )
+        # Keep the request unchanged if the latest turn alone exceeds the budget
+        if not trimmed or len(trimmed) == len(request.messages):
+            return request
+        return request.override(messages=trimmed)
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        return handler(self._trim(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        return await handler(self._trim(request))
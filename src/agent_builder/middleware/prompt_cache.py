@@ -0,0 +1,42 @@
+"""Prompt cache routing middleware for OpenAI chat models."""
+
+from typing import Awaitable, Callable
+
+from langchain.agents.middleware.types import AgentMiddleware, ModelRequest, ModelResponse
+
+
+class PromptCacheKeyMiddleware(AgentMiddleware):
+    """Middleware that sends an OpenAI ``prompt_cache_key`` with every model call.
+
+    The key is added to the request's model settings, which the agent binds onto the
+    model per call, so agents with different static prompts can share one chat
+    model client while each prompt prefix is still routed to its own cache.
+    """
+
+    def __init__(self, prompt_cache_key: str):
+        """Initialize the middleware.
+
+        Args:
+            prompt_cache_key: Key sent as ``prompt_cache_key`` on each request.
+        """
+        super().__init__()
+        self.prompt_cache_key = prompt_cache_key
+
+    def _with_key(self, request: ModelRequest) -> ModelRequest:
+        return request.override(
+            model_settings={**request.model_settings, "prompt_cache_key": self.prompt_cache_key}
+        )
+
+    def wrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], ModelResponse],
+    ) -> ModelResponse:
+        return handler(self._with_key(request))
+
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        return await handler(self._with_key(request))
@@ -1,6 +1,7 @@
-from typing import List, Literal, Dict, Any
+from types import MappingProxyType
+from typing import List, Literal, Dict, Any, Mapping
 from typing_extensions import TypedDict, NotRequired
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 
 
 class ConfirmInfo(TypedDict):
@@ -19,6 +20,8 @@ class ConfirmInfo(TypedDict):
 class Tool(BaseModel):
     """Tool configuration for a skill."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., description="Tool name")
     config: Dict[str, Any] = Field(default_factory=dict, description="Tool configuration parameters")
 
@@ -26,6 +29,8 @@ class Tool(BaseModel):
 class Skill(BaseModel):
     """Skill is also a single agent."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., min_length=1, max_length=50, description="Skill name")
     when_to_use: str = Field(
         ...,
@@ -40,6 +45,8 @@ class Skill(BaseModel):
 class AgentConfig(BaseModel):
     """Agent configuration schema."""
 
+    model_config = ConfigDict(frozen=True)
+
     name: str = Field(..., min_length=1, max_length=100, description="Agent name")
     description: str = Field(
         ...,
@@ -52,11 +59,11 @@ class AgentConfig(BaseModel):
         min_length=10,
         description="System prompt defining agent role and behavior"
     )
-    skills: List[Skill] = Field(..., min_items=1, max_items=1, description="Skill list. Current only support just one skill")
+    skills: List[Skill] = Field(..., min_length=1, max_length=1, description="Skill list. Current only support just one skill")
 
 
 # Available system tools for agent building
-AVAILABLE_TOOLS = [
+_AVAILABLE_TOOLS_RAW = [
     {
         "tool_id": "sms",
         "name": "send_sms",
@@ -118,3 +125,10 @@ AVAILABLE_TOOLS = [
         "config_required": []
     },
 ]
+
+# Read-only view of the tool definitions, plus the set of names for O(1) membership checks
+AVAILABLE_TOOLS: tuple[Mapping[str, Any], ...] = tuple(
+    MappingProxyType({**tool, "config_required": tuple(tool["config_required"])})
+    for tool in _AVAILABLE_TOOLS_RAW
+)
+AVAILABLE_TOOL_NAMES: frozenset[str] = frozenset(t["name"] for t in AVAILABLE_TOOLS)
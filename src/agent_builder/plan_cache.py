@@ -0,0 +1,115 @@
+"""Plan cache for the Agent Builder.
+
+Stores generalized AgentConfig templates keyed by the intent of the build request
+(e.g. "restaurant booking"), so a later request with the same intent can start from
+the template instead of re-running research and configuration from scratch.
+"""
+import os
+import sqlite3
+import threading
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from pydantic import ValidationError
+
+from src.agent_builder.agent_single_create import _get_chat_model
+from src.agent_builder.models import AgentConfig
+from src.utils.logger import logger
+
+PLAN_CACHE_DB_PATH = os.getenv("AGENT_PLAN_CACHE_PATH", ".agent_plan_cache.db")
+
+# Small model used for intent extraction and template generalization
+PLAN_CACHE_MODEL = "openai:gpt-4o-mini"
+
+INTENT_PROMPT = """Classify the kind of agent the user wants to build.
+Reply with ONLY a short lowercase English noun phrase of 1-4 words naming the agent's purpose, e.g. "restaurant booking" or "hotel customer service".
+Ignore URLs, business names and any other specifics."""
+
+GENERALIZE_PROMPT = """You turn a concrete agent configuration into a reusable template.
+Remove entity-specific details (business names, URLs, addresses, phone numbers, prices, opening hours) and replace them with generic wording.
+Keep the structure, skills, tools and language of the configuration unchanged.
+Reply with ONLY the JSON object of the template, using the same keys as the input."""
+
+# Appended to the user's request on a cache hit; {template} is the template's JSON
+PLAN_CACHE_HINT = """A configuration template from a previous agent with the same purpose is already loaded in state:
+
+```json
+{template}
+```
+
+Adapt this template to the request above instead of building from scratch; only delegate web research if the request needs details the template lacks."""
+
+
+def extract_intent(query: str) -> str:
+    """Extract a normalized intent keyword from a build request.
+
+    Args:
+        query: The user's agent building request
+
+    Returns:
+        Lowercase intent phrase used as the cache key
+    """
+    response = _get_chat_model(PLAN_CACHE_MODEL).invoke(
+        [SystemMessage(content=INTENT_PROMPT), HumanMessage(content=query)]
+    )
+    return " ".join(str(response.content).lower().strip().strip("\"'.").split())
+
+
+def generalize_config(config: AgentConfig) -> AgentConfig | None:
+    """Strip entity-specific details from a finished config to make a reusable template.
+
+    Args:
+        config: The AgentConfig produced by the builder
+
+    Returns:
+        The generalized template, or None if the model output did not validate
+    """
+    model = _get_chat_model(PLAN_CACHE_MODEL).bind(response_format={"type": "json_object"})
+    response = model.invoke(
+        [SystemMessage(content=GENERALIZE_PROMPT), HumanMessage(content=config.model_dump_json())]
+    )
+    try:
+        return AgentConfig.model_validate_json(response.content)
+    except ValidationError as e:
+        logger.warning("Could not generalize agent config for the plan cache: %s", e)
+        return None
+
+
+class PlanCache:
+    """SQLite-backed store of generalized AgentConfig templates keyed by intent."""
+
+    def __init__(self, path: str = PLAN_CACHE_DB_PATH):
+        """Open (and create if needed) the plan cache database.
+
+        Args:
+            path: Path to the SQLite database file.
+        """
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS plan_cache (intent TEXT PRIMARY KEY, template TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, intent: str) -> AgentConfig | None:
+        """Return the cached template for an intent, or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT template FROM plan_cache WHERE intent = ?", (intent,)
+            ).fetchone()
+        if row is None:
+            return None
+        try:
+            return AgentConfig.model_validate_json(row[0])
+        except ValidationError as e:
+            logger.warning("Ignoring invalid plan cache entry for %r: %s", intent, e)
+            return None
+
+    def put(self, intent: str, template: AgentConfig) -> None:
+        """Store (or replace) the template for an intent."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO plan_cache (intent, template) VALUES (?, ?)",
+                (intent, template.model_dump_json()),
+            )
+            self._conn.commit()
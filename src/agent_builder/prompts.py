@@ -1,5 +1,10 @@
 """Prompt templates and tool descriptions for the Agent Builder deepagent."""
 
+import functools
+from string import Template
+
+from src.agent_builder.models import AVAILABLE_TOOLS
+
 AGENT_BUILDER_WORKFLOW_INSTRUCTIONS = """# Agent Builder Workflow
 
 **CRITICAL: Language Consistency**
@@ -17,6 +22,7 @@ Follow this workflow for all agent building requests:
 3. **Collect Information**:
    - Gather basic agent information (name, description, purpose) - use ask_user_to_provide_info if needed
    - If user send a url, please delegate to web-search-agent to search it.
+   - If the basic agent information is already known, delegate to config-manager-agent to draft the configuration skeleton (name, description, system_prompt) in the SAME response as the web-search-agent task, so both run in parallel; skills are filled in after step 4
 4. **Analyze Agent SOP**: Analyze what agent sop the agent needs based on the requirements, please write into `agent_sop.md` file.
 5. **Generate Configuration**:
    - After `agent_sop.md` generated or updated, delegate to config-manager-agent to generate the agent configuration based on the agent sop (read from `agent_sop.md` file)
@@ -60,7 +66,7 @@ Follow this workflow for all agent building requests:
 - Optional information: specific tools, domain knowledge, conversation style
 """
 
-WEB_SEARCH_AGENT_INSTRUCTIONS = """You are a web search assistant helping to find reference information for agent building. For context, today's date is {date}.
+WEB_SEARCH_AGENT_INSTRUCTIONS = """You are a web search assistant helping to find reference information for agent building.
 
 <Task>
 Your job is to search the web for relevant information about agent design patterns, best practices, and reference implementations.
@@ -129,6 +135,8 @@ The system prompt should establish a professional, helpful persona [2]. Example
 [2] Agent Prompt Design Guide: https://example.com/prompt-guide
 ```
 </Final Response Format>
+
+For context, today's date is {date}.
 """
 
 CONFIG_MANAGER_AGENT_INSTRUCTIONS = """You are a configuration manager responsible for generating and managing agent configurations.
@@ -461,6 +469,8 @@ Only parallelize when tasks are truly independent:
 - Searching multiple unrelated reference topics
 - Generating multiple independent skill configurations
 
+When delegating independent tasks, issue all of their `task` tool calls in a SINGLE response so they run concurrently, instead of one call per turn.
+
 Use at most {max_concurrent_units} parallel sub-agents per iteration.
 
 ## Iteration Limits
@@ -469,3 +479,49 @@ Use at most {max_concurrent_units} parallel sub-agents per iteration.
 - Stop when configuration is complete and user-confirmed
 - Bias towards focused work over exhaustive exploration
 """
+
+
+# Templates compiled once; rendering substitutes the few placeholders instead of
+# having str.format re-parse the whole prompt on every call
+_WEB_SEARCH_TEMPLATE = Template(WEB_SEARCH_AGENT_INSTRUCTIONS.replace("{date}", "$date"))
+_SUBAGENT_DELEGATION_TEMPLATE = Template(
+    SUBAGENT_DELEGATION_INSTRUCTIONS.replace("{max_concurrent_units}", "$max_concurrent_units").replace(
+        "{max_iterations}", "$max_iterations"
+    )
+)
+
+
+@functools.cache
+def web_search_instructions(date: str) -> str:
+    """Render WEB_SEARCH_AGENT_INSTRUCTIONS for the given date (YYYY-MM-DD)."""
+    return _WEB_SEARCH_TEMPLATE.substitute(date=date)
+
+
+@functools.cache
+def subagent_delegation_instructions(max_concurrent_units: int, max_iterations: int) -> str:
+    """Render SUBAGENT_DELEGATION_INSTRUCTIONS with the given delegation limits."""
+    return _SUBAGENT_DELEGATION_TEMPLATE.substitute(
+        max_concurrent_units=max_concurrent_units, max_iterations=max_iterations
+    )
+
+
+@functools.cache
+def generate_available_tools_list() -> str:
+    """Generate formatted list of available tools from AVAILABLE_TOOLS."""
+    def _fmt(idx, tool):
+        config_required = tool.get("config_required") or ()
+        config_info = f"Config required: {', '.join(config_required)}" if config_required else "No config required"
+        return f'{idx}. **{tool["name"]}**\n   - {tool["description"]}\n   - {config_info}'
+
+    return "\n\n".join(_fmt(idx, tool) for idx, tool in enumerate(AVAILABLE_TOOLS, 1))
+
+
+@functools.cache
+def config_manager_instructions() -> str:
+    """Render CONFIG_MANAGER_AGENT_INSTRUCTIONS with the available tools list.
+
+    Rendered once per process: AVAILABLE_TOOLS is immutable, so the result cannot go
+    stale. The template holds literal JSON braces, so the list is spliced in at its
+    sentinel rather than via str.format.
+    """
+    return CONFIG_MANAGER_AGENT_INSTRUCTIONS.replace("[[AVAILABLE_TOOLS_LIST]]", generate_available_tools_list())
@@ -4,14 +4,309 @@ This module provides search and content processing utilities for the research ag
 using Tavily for URL discovery and fetching full webpage content.
 """
 
+import asyncio
+import atexit
+import functools
+import hashlib
+import os
+import ssl
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit, urlunsplit
+
+import certifi
 import httpx
+from cachetools import TTLCache
 from langchain_core.tools import InjectedToolArg, tool
+from langgraph.config import get_config
 from langgraph.types import interrupt
-from markdownify import markdownify
-from tavily import TavilyClient
+from selectolax.lexbor import LexborHTMLParser
 from typing_extensions import Annotated, Literal
 
-tavily_client = TavilyClient()
+try:
+    import diskcache
+except ImportError:  # optional: persist web_search results across processes
+    diskcache = None
+
+if TYPE_CHECKING:
+    from tavily import TavilyClient
+
+FETCH_TIMEOUT: float = 10.0
+
+_NL = "\n"
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Header set, TLS context and pool limits built once and shared by the sync and async
+# clients, instead of being rebuilt (CA bundle load included) per client
+_HEADERS = httpx.Headers(DEFAULT_HEADERS)
+_SSL_CONTEXT = ssl.create_default_context(cafile=certifi.where())
+_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+
+# Shared sync client: keeps TCP/TLS connections alive across fetches and multiplexes over HTTP/2
+_HTTP_CLIENT = httpx.Client(
+    http2=True,
+    headers=_HEADERS,
+    verify=_SSL_CONTEXT,
+    timeout=FETCH_TIMEOUT,
+    limits=_HTTP_LIMITS,
+)
+atexit.register(_HTTP_CLIENT.close)
+
+# Worker threads for the sync web_search path, which fans page fetches out over _HTTP_CLIENT
+MAX_PARALLEL_FETCHES: int = 8
+_FETCH_POOL = ThreadPoolExecutor(max_workers=MAX_PARALLEL_FETCHES, thread_name_prefix="page-fetch")
+
+# Long-lived async clients for the coroutine paths. An AsyncClient's connection pool is
+# bound to the event loop that uses it, so one client is kept per loop and released with it.
+_ASYNC_CLIENTS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+# Tool results memoized per conversation thread, so parallel sub-agents that issue
+# the same call only pay for it once
+_TOOL_RESULT_CACHE: TTLCache = TTLCache(maxsize=512, ttl=600)
+_TOOL_RESULT_LOCK = threading.Lock()
+
+# web_search results shared across threads and runs, keyed by (query, max_results, topic).
+# News goes stale within the TTL, so those searches are never cached.
+WEB_SEARCH_CACHE_TTL: int = 24 * 3600
+_UNCACHED_TOPICS = frozenset({"news"})
+WEB_SEARCH_CACHE_DIR = os.path.expanduser("~/.cache/agent_builder/websearch")
+_WEB_SEARCH_CACHE: TTLCache = TTLCache(maxsize=256, ttl=WEB_SEARCH_CACHE_TTL)
+_WEB_SEARCH_LOCK = threading.Lock()
+
+# Converted pages shared across searches, keyed by canonical URL; failed fetches are not stored
+PAGE_CACHE_TTL: int = 3600
+_PAGE_CACHE: TTLCache = TTLCache(maxsize=1024, ttl=PAGE_CACHE_TTL)
+_PAGE_LOCK = threading.Lock()
+
+# Prefix of the placeholder returned for pages that could not be fetched
+_FETCH_ERROR_PREFIX = "Error fetching content from "
+
+# Upper bound on bytes read from a single page; anything beyond is never downloaded
+MAX_BYTES: int = 2 * 1024 * 1024
+_READ_CHUNK_SIZE = 64 * 1024
+_HTML_CONTENT_TYPES = frozenset({"text/html", "application/xhtml+xml"})
+
+# think_tool echoes the reflection back only when AGENT_VERBOSE_REFLECT is set (the
+# model already has it in its own tool call); echoes are capped at this many characters
+THINK_TOOL_VERBOSE: bool = bool(os.getenv("AGENT_VERBOSE_REFLECT"))
+THINK_TOOL_MAX_CHARS: int = 4096
+_REFLECTION_ACK = "Reflection recorded."
+
+# Page chrome dropped before markdown conversion
+_BOILERPLATE_SELECTOR = "script,style,noscript,nav,footer,aside,svg,iframe"
+
+
+def _current_thread_id() -> str | None:
+    """Return the thread_id of the running graph, or None outside a graph run."""
+    try:
+        return get_config().get("configurable", {}).get("thread_id")
+    except RuntimeError:
+        return None
+
+
+def _memoized_tool_call(tool_name: str, args: tuple, fn):
+    """Return a cached result for (thread_id, tool_name, args), computing it with fn on a miss.
+
+    Outside a graph run there is no thread to scope the memo to, so fn is called
+    directly. Results that contain a page fetch error are not stored, so a retry
+    fetches again instead of replaying the failure.
+
+    Args:
+        tool_name: Name of the tool being called
+        args: Hashable tuple of the call arguments
+        fn: Zero-argument callable producing the result
+
+    Returns:
+        The tool result
+    """
+    thread_id = _current_thread_id()
+    if thread_id is None:
+        return fn()
+
+    key = (thread_id, tool_name, args)
+    with _TOOL_RESULT_LOCK:
+        if key in _TOOL_RESULT_CACHE:
+            return _TOOL_RESULT_CACHE[key]
+
+    result = fn()
+
+    if _FETCH_ERROR_PREFIX not in result:
+        with _TOOL_RESULT_LOCK:
+            _TOOL_RESULT_CACHE[key] = result
+    return result
+
+
+async def _amemoized_tool_call(tool_name: str, args: tuple, coro_fn):
+    """Async variant of _memoized_tool_call; coro_fn returns an awaitable."""
+    thread_id = _current_thread_id()
+    if thread_id is None:
+        return await coro_fn()
+
+    key = (thread_id, tool_name, args)
+    with _TOOL_RESULT_LOCK:
+        if key in _TOOL_RESULT_CACHE:
+            return _TOOL_RESULT_CACHE[key]
+
+    result = await coro_fn()
+
+    if _FETCH_ERROR_PREFIX not in result:
+        with _TOOL_RESULT_LOCK:
+            _TOOL_RESULT_CACHE[key] = result
+    return result
+
+
+@functools.cache
+def _tavily() -> "TavilyClient":
+    """Return the shared Tavily client, created on first search.
+
+    Deferred so importing this module does not load tavily or look up credentials.
+    """
+    from tavily import TavilyClient
+
+    return TavilyClient()
+
+
+@functools.cache
+def _md():
+    """Return markdownify, imported on first page conversion (pulls in bs4)."""
+    from markdownify import markdownify
+
+    return markdownify
+
+
+def _html_to_markdown(html: str) -> str:
+    """Convert a page to markdown, keeping only its main content.
+
+    The page is parsed with selectolax (lexbor C parser) to drop scripts, styles and page
+    chrome, and markdownify only runs on the remaining main/article/body subtree.
+
+    Args:
+        html: Raw page HTML
+
+    Returns:
+        Page content as markdown
+    """
+    tree = LexborHTMLParser(html)
+    for node in tree.css(_BOILERPLATE_SELECTOR):
+        node.decompose()
+    main = tree.css_first("main") or tree.css_first("article") or tree.body
+    if main is None:
+        return _md()(html)
+    return _md()(main.html)
+
+
+def _media_type(response: httpx.Response) -> str:
+    """Return the response's lowercase media type without parameters (may be empty)."""
+    return response.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+
+
+def _unsupported_content(url: str, media_type: str) -> str | None:
+    """Return a placeholder for non-HTML responses, or None if the page should be parsed."""
+    if not media_type or media_type in _HTML_CONTENT_TYPES:
+        return None
+    return f"Skipped {url}: unsupported content type {media_type}"
+
+
+class _PageReader:
+    """Download policy shared by the sync and async page fetchers.
+
+    Checks the status and content type of a streamed response, collects body chunks
+    up to MAX_BYTES, then decodes the body and converts it to markdown. The callers
+    only differ in how they iterate the stream.
+    """
+
+    __slots__ = ("_response", "_chunks", "_total", "skipped")
+
+    def __init__(self, url: str, response: httpx.Response):
+        response.raise_for_status()
+        self._response = response
+        self._chunks: list[bytes] = []
+        self._total = 0
+        # Placeholder for a non-HTML page, in which case the body is not read
+        self.skipped = _unsupported_content(url, _media_type(response))
+
+    def feed(self, chunk: bytes) -> bool:
+        """Collect a chunk; return True once MAX_BYTES are in and reading should stop."""
+        self._chunks.append(chunk)
+        self._total += len(chunk)
+        return self._total >= MAX_BYTES
+
+    def markdown(self) -> str:
+        """Return the collected page as markdown, or the placeholder for skipped pages.
+
+        Decodes straight from a memoryview slice, so an oversized body is not copied
+        again just to cut it at MAX_BYTES.
+        """
+        if self.skipped is not None:
+            return self.skipped
+        body = memoryview(b"".join(self._chunks))[:MAX_BYTES]
+        return _html_to_markdown(str(body, self._response.charset_encoding or "utf-8", "replace"))
+
+
+@functools.cache
+def _web_search_disk_cache():
+    """Return the on-disk web_search cache, or None when diskcache is not installed."""
+    if diskcache is None:
+        return None
+    return diskcache.Cache(WEB_SEARCH_CACHE_DIR)
+
+
+def _canonical_url(url: str) -> str:
+    """Normalize a URL for duplicate detection (lowercase scheme/host, no fragment or trailing slash)."""
+    parts = urlsplit(url)
+    return urlunsplit(
+        (parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", parts.query, "")
+    )
+
+
+def _dedupe_results(results: list[dict]) -> list[dict]:
+    """Drop search results whose URL matches an earlier result's canonical URL."""
+    unique: dict[str, dict] = {}
+    for result in results:
+        unique.setdefault(_canonical_url(result["url"]), result)
+    return list(unique.values())
+
+
+def _web_search_cache_key(query: str, max_results: int, topic: str) -> str | None:
+    """Return the cache key for a search, or None if its topic is not cached."""
+    if topic in _UNCACHED_TOPICS:
+        return None
+    return hashlib.sha1(f"{query}|{max_results}|{topic}".encode("utf-8")).hexdigest()
+
+
+def _web_search_cache_get(key: str | None) -> str | None:
+    """Look up a formatted web_search result in memory, then on disk."""
+    if key is None:
+        return None
+    with _WEB_SEARCH_LOCK:
+        cached = _WEB_SEARCH_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    disk = _web_search_disk_cache()
+    if disk is None:
+        return None
+    cached = disk.get(key)
+    if cached is not None:
+        with _WEB_SEARCH_LOCK:
+            _WEB_SEARCH_CACHE[key] = cached
+    return cached
+
+
+def _web_search_cache_put(key: str | None, result: str, contents: list[str]) -> None:
+    """Store a formatted web_search result unless it is uncached or any of its page fetches failed."""
+    if key is None or any(content.startswith(_FETCH_ERROR_PREFIX) for content in contents):
+        return
+    with _WEB_SEARCH_LOCK:
+        _WEB_SEARCH_CACHE[key] = result
+    disk = _web_search_disk_cache()
+    if disk is not None:
+        disk.set(key, result, expire=WEB_SEARCH_CACHE_TTL)
 
 
 @tool(parse_docstring=True)
@@ -50,6 +345,20 @@ def ask_user_to_provide_info(confirm_message: str):
 #     )
 
 
+def _page_cache_get(url: str) -> str | None:
+    """Return the cached markdown for a page, or None on a miss."""
+    with _PAGE_LOCK:
+        return _PAGE_CACHE.get(_canonical_url(url))
+
+
+def _page_cache_put(url: str, content: str) -> None:
+    """Cache a page's markdown unless it is a fetch error placeholder."""
+    if content.startswith(_FETCH_ERROR_PREFIX):
+        return
+    with _PAGE_LOCK:
+        _PAGE_CACHE[_canonical_url(url)] = content
+
+
 def _fetch_webpage_content_impl(url: str) -> str:
     """Internal implementation to fetch and convert webpage content to markdown.
 
@@ -59,18 +368,81 @@ def _fetch_webpage_content_impl(url: str) -> str:
     Returns:
         Webpage content as markdown
     """
-    timeout: float = 10.0
+    cached = _page_cache_get(url)
+    if cached is not None:
+        return cached
+    content = _download_webpage_content(url)
+    _page_cache_put(url, content)
+    return content
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
 
+def _download_webpage_content(url: str) -> str:
+    """Download a page (up to MAX_BYTES) and convert it to markdown, bypassing the page cache."""
     try:
-        response = httpx.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        return markdownify(response.text)
+        with _HTTP_CLIENT.stream("GET", url) as response:
+            page = _PageReader(url, response)
+            if page.skipped is None:
+                for chunk in response.iter_bytes(_READ_CHUNK_SIZE):
+                    if page.feed(chunk):
+                        break
+        return page.markdown()
+    except Exception as e:
+        return f"{_FETCH_ERROR_PREFIX}{url}: {str(e)}"
+
+
+def _async_http_client() -> httpx.AsyncClient:
+    """Return the shared HTTP/2 AsyncClient for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _ASYNC_CLIENTS.get(loop)
+    if client is None:
+        client = _ASYNC_CLIENTS[loop] = httpx.AsyncClient(
+            http2=True,
+            headers=_HEADERS,
+            verify=_SSL_CONTEXT,
+            timeout=FETCH_TIMEOUT,
+            limits=_HTTP_LIMITS,
+        )
+    return client
+
+
+async def _afetch_webpage_content_impl(url: str, client: httpx.AsyncClient) -> str:
+    """Async variant of _download_webpage_content using a shared AsyncClient.
+
+    Args:
+        url: URL to fetch
+        client: Long-lived client of the running event loop
+
+    Returns:
+        Webpage content as markdown
+    """
+    try:
+        async with client.stream("GET", url) as response:
+            page = _PageReader(url, response)
+            if page.skipped is None:
+                async for chunk in response.aiter_bytes(_READ_CHUNK_SIZE):
+                    if page.feed(chunk):
+                        break
+        return page.markdown()
     except Exception as e:
-        return f"Error fetching content from {url}: {str(e)}"
+        return f"{_FETCH_ERROR_PREFIX}{url}: {str(e)}"
+
+
+async def _afetch_all(urls: list[str]) -> list[str]:
+    """Fetch several URLs concurrently, preserving input order.
+
+    Pages already in the page cache are served from it; only the misses are downloaded.
+    """
+    contents = [_page_cache_get(url) for url in urls]
+    missing = [i for i, content in enumerate(contents) if content is None]
+    if not missing:
+        return contents
+
+    client = _async_http_client()
+    fetched = await asyncio.gather(*(_afetch_webpage_content_impl(urls[i], client) for i in missing))
+    for i, content in zip(missing, fetched):
+        _page_cache_put(urls[i], content)
+        contents[i] = content
+    return contents
 
 
 @tool(parse_docstring=True)
@@ -83,7 +455,89 @@ def fetch_webpage_content(url: str) -> str:
     Returns:
         Webpage content as markdown
     """
-    return _fetch_webpage_content_impl(url)
+    return _memoized_tool_call(
+        "fetch_webpage_content", (url,), lambda: _fetch_webpage_content_impl(url)
+    )
+
+
+async def _afetch_webpage_content(url: str) -> str:
+    """Async entry point for fetch_webpage_content."""
+    async def _fetch() -> str:
+        return (await _afetch_all([url]))[0]
+
+    return await _amemoized_tool_call("fetch_webpage_content", (url,), _fetch)
+
+
+fetch_webpage_content.coroutine = _afetch_webpage_content
+
+
+def _web_search_impl(query: str, max_results: int, topic: str) -> str:
+    """Internal implementation of web_search.
+
+    Args:
+        query: Search query to execute
+        max_results: Maximum number of results to return
+        topic: Topic filter
+
+    Returns:
+        Formatted search results with full webpage content
+    """
+    key = _web_search_cache_key(query, max_results, topic)
+    cached = _web_search_cache_get(key)
+    if cached is not None:
+        return cached
+
+    # Use Tavily to discover URLs
+    search_results = _tavily().search(
+        query,
+        max_results=max_results,
+        topic=topic,
+    )
+
+    # Fetch full content for all URLs concurrently over the shared sync client
+    results = _dedupe_results(search_results.get("results", []))
+    urls = [result["url"] for result in results]
+    if len(urls) > 1:
+        contents = list(_FETCH_POOL.map(_fetch_webpage_content_impl, urls))
+    else:
+        contents = [_fetch_webpage_content_impl(url) for url in urls]
+
+    response = _format_search_results(query, results, contents)
+    _web_search_cache_put(key, response, contents)
+    return response
+
+
+async def _aweb_search_impl(query: str, max_results: int, topic: str) -> str:
+    """Async implementation of web_search that fetches all result URLs concurrently."""
+    key = _web_search_cache_key(query, max_results, topic)
+    cached = await asyncio.to_thread(_web_search_cache_get, key)
+    if cached is not None:
+        return cached
+
+    search_results = await asyncio.to_thread(
+        _tavily().search,
+        query,
+        max_results=max_results,
+        topic=topic,
+    )
+
+    results = _dedupe_results(search_results.get("results", []))
+    contents = await _afetch_all([result["url"] for result in results])
+
+    response = _format_search_results(query, results, contents)
+    await asyncio.to_thread(_web_search_cache_put, key, response, contents)
+    return response
+
+
+def _format_search_results(query: str, results: list[dict], contents: list[str]) -> str:
+    """Format Tavily results and their fetched page contents as the web_search response."""
+    pairs = list(zip(results, contents))
+    parts = [f"🔍 Found {len(pairs)} result(s) for '{query}':{_NL}{_NL}"]
+    for i, (result, content) in enumerate(pairs):
+        if i:
+            parts.append(_NL)
+        parts.extend(("## ", result["title"], "\n**URL:** ", result["url"], "\n\n", content, "\n\n---\n"))
+    return "".join(parts)
 
 
 @tool(parse_docstring=True)
@@ -106,37 +560,27 @@ def web_search(
     Returns:
         Formatted search results with full webpage content
     """
-    # Use Tavily to discover URLs
-    search_results = tavily_client.search(
-        query,
-        max_results=max_results,
-        topic=topic,
+    return _memoized_tool_call(
+        "web_search",
+        (query, max_results, topic),
+        lambda: _web_search_impl(query, max_results, topic),
     )
 
-    # Fetch full content for each URL
-    result_texts = []
-    for result in search_results.get("results", []):
-        url = result["url"]
-        title = result["title"]
-
-        # Fetch webpage content
-        content = _fetch_webpage_content_impl(url)
-
-        result_text = f"""## {title}
-**URL:** {url}
 
-{content}
-
----
-"""
-        result_texts.append(result_text)
-
-    # Format final response
-    response = f"""🔍 Found {len(result_texts)} result(s) for '{query}':
+async def _aweb_search(
+    query: str,
+    max_results: int = 1,
+    topic: Literal["general", "news", "finance"] = "general",
+) -> str:
+    """Async entry point for web_search."""
+    return await _amemoized_tool_call(
+        "web_search",
+        (query, max_results, topic),
+        lambda: _aweb_search_impl(query, max_results, topic),
+    )
 
-{chr(10).join(result_texts)}"""
 
-    return response
+web_search.coroutine = _aweb_search
 
 
 @tool(parse_docstring=True)
@@ -164,4 +608,6 @@ def think_tool(reflection: str) -> str:
     Returns:
         Confirmation that reflection was recorded for decision-making
     """
-    return f"Reflection recorded: {reflection}"
+    if not THINK_TOOL_VERBOSE:
+        return _REFLECTION_ACK
+    return f"Reflection recorded: {reflection[:THINK_TOOL_MAX_CHARS]}"
@@ -1,12 +1,81 @@
 
+import atexit
 import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_FILE = 'agent_builder.log'
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Write buffer for the log file, so bursts of records coalesce into few write() calls
+LOG_BUFFER_SIZE = 64 * 1024
+
+
+class _BufferedRotatingFileHandler(RotatingFileHandler):
+    """RotatingFileHandler that writes through a LOG_BUFFER_SIZE buffer.
+
+    ``emit()`` does not flush after each record; the queue listener flushes once
+    it has drained the queue. The file size is tracked here because the stock
+    rollover check calls ``tell()``, which would flush the buffer.
+    """
+
+    def _open(self):
+        stream = open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                      encoding=self.encoding, errors=self.errors)
+        self._size = os.fstat(stream.fileno()).st_size
+        return stream
+
+    def emit(self, record):
+        try:
+            msg = self.format(record) + self.terminator
+            if self.stream is None:
+                self.stream = self._open()
+            # Size is approximate (characters, not encoded bytes)
+            if self.maxBytes > 0 and self._size and self._size + len(msg) >= self.maxBytes:
+                self.doRollover()
+                if self.stream is None:
+                    self.stream = self._open()
+            self.stream.write(msg)
+            self._size += len(msg)
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+class _FlushWhenIdleListener(QueueListener):
+    """QueueListener that flushes its handlers whenever the queue runs empty."""
+
+    def handle(self, record):
+        super().handle(record)
+        if self.queue.empty():
+            self._flush()
+
+    def stop(self):
+        # The stop sentinel keeps the queue non-empty while the last records are handled
+        super().stop()
+        self._flush()
+
+    def _flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
+# Configure logging - only log to file, not console (except for interrupts).
+# QueueHandler.prepare() still merges the message with its args (and any
+# exc_info) on the calling thread; a background listener thread applies
+# LOG_FORMAT and does the file writes, rotating the file so it cannot grow unbounded.
+_log_queue: queue.Queue = queue.Queue(-1)
+
+_file_handler = _BufferedRotatingFileHandler(LOG_FILE, maxBytes=10_000_000, backupCount=5)
+_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+_listener = _FlushWhenIdleListener(_log_queue, _file_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)
+
+_root = logging.getLogger()
+_root.setLevel(logging.INFO)
+_root.addHandler(QueueHandler(_log_queue))
 
-# Configure logging - only log to file, not console (except for interrupts)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('agent_builder.log')
-    ]
-)
 logger = logging.getLogger(__name__)
@@ -1,14 +1,40 @@
-"""Test script to understand interrupt data structure."""
+"""Test script to understand interrupt data structure.
+
+Run with --offline to inspect the same structure from a one-node StateGraph that
+interrupts directly, without a model call or API key.
+"""
+import functools
+import os
+import sys
 import uuid
 from dotenv import load_dotenv
 from langchain.chat_models import init_chat_model
 from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.graph import END, START, MessagesState, StateGraph
 from langgraph.types import interrupt
 from langchain_core.tools import tool
 from deepagents import create_deep_agent
 
 load_dotenv()
 
+# Set INTERRUPT_DEBUG=1 to also dump the full attribute lists of tasks and interrupts
+VERBOSE = os.environ.get("INTERRUPT_DEBUG") == "1"
+
+OFFLINE = "--offline" in sys.argv[1:]
+
+_INTERRUPT_HEADER = "\n  --- Interrupt {} ---\n  Interrupt type: {}"
+
+
+@functools.lru_cache(maxsize=None)
+def _public_attrs(t: type) -> frozenset:
+    """Public attribute names of a type, computed once per type.
+
+    Interrupt (slots dataclass) and PregelTask (NamedTuple) expose their fields as
+    class-level descriptors, so the type's dir() covers the instance fields.
+    """
+    return frozenset(a for a in dir(t) if not a.startswith('_'))
+
+
 # Define a simple interrupt tool
 @tool
 def ask_user_to_provide_info(confirm_message: str):
@@ -27,21 +53,42 @@ def ask_user_to_provide_info(confirm_message: str):
         }
     )
 
-# Create a simple agent with interrupt tool
-model = init_chat_model(model="openai:gpt-4o")
-checkpointer = InMemorySaver()
-
-agent = create_deep_agent(
-    model=model,
-    checkpointer=checkpointer,
-    tools=[ask_user_to_provide_info],
-    system_prompt="You are a test agent. When user asks for help, use ask_user_to_provide_info to ask them for more details.",
-)
+def _build_offline_graph():
+    """Build a one-node graph that raises the same interrupt payload as the tool."""
+    def ask_node(state: MessagesState):
+        interrupt(
+            {
+                "tool": "ask_user_to_provide_info",
+                "confirm_message": "Could you tell me more about what you need help with?",
+            }
+        )
+        return {}
+
+    builder = StateGraph(MessagesState)
+    builder.add_node("ask_user_to_provide_info", ask_node)
+    builder.add_edge(START, "ask_user_to_provide_info")
+    builder.add_edge("ask_user_to_provide_info", END)
+    return builder.compile(checkpointer=InMemorySaver())
+
+
+if OFFLINE:
+    agent = _build_offline_graph()
+else:
+    # Create a simple agent with interrupt tool
+    model = init_chat_model(model="openai:gpt-4o")
+    checkpointer = InMemorySaver()
+
+    agent = create_deep_agent(
+        model=model,
+        checkpointer=checkpointer,
+        tools=[ask_user_to_provide_info],
+        system_prompt="You are a test agent. When user asks for help, use ask_user_to_provide_info to ask them for more details.",
+    )
 
 config = {"configurable": {"thread_id": str(uuid.uuid4())}}
 
 print("=" * 80)
-print("Testing interrupt data structure")
+print(f"Testing interrupt data structure{' (offline)' if OFFLINE else ''}")
 print("=" * 80)
 
 # Invoke agent with a message that should trigger interrupt
@@ -58,54 +105,63 @@ except Exception as e:
 # Get state to check for interrupt
 state = agent.get_state(config)
 
-print("\n" + "=" * 80)
-print("State Analysis")
-print("=" * 80)
-print(f"state.next: {state.next}")
-print(f"Has __interrupt__: {'__interrupt__' in state.next if state.next else False}")
+# Collect the report and write it in one go instead of one print per line
+out = []
+out.append("\n" + "=" * 80)
+out.append("State Analysis")
+out.append("=" * 80)
+out.append(f"state.next: {state.next}")
+out.append(f"Has __interrupt__: {'__interrupt__' in state.next if state.next else False}")
 
 if state.tasks:
-    print(f"\nNumber of tasks: {len(state.tasks)}")
+    out.append(f"\nNumber of tasks: {len(state.tasks)}")
     for i, task in enumerate(state.tasks):
-        print(f"\n--- Task {i} ---")
-        print(f"Task type: {type(task)}")
-        print(f"Task attributes: {dir(task)}")
+        task_type = type(task)
+        task_attrs = _public_attrs(task_type)
+        out.append(f"\n--- Task {i} ---")
+        out.append(f"Task type: {task_type}")
+        if VERBOSE:
+            out.append(f"Task attributes: {dir(task)}")
 
-        if hasattr(task, 'interrupts'):
-            print(f"Has interrupts: True")
-            print(f"Number of interrupts: {len(task.interrupts)}")
+        if 'interrupts' in task_attrs:
+            out.append(f"Has interrupts: True")
+            out.append(f"Number of interrupts: {len(task.interrupts)}")
 
             for j, interrupt_item in enumerate(task.interrupts):
-                print(f"\n  --- Interrupt {j} ---")
-                print(f"  Interrupt type: {type(interrupt_item)}")
-                print(f"  Interrupt attributes: {[attr for attr in dir(interrupt_item) if not attr.startswith('_')]}")
+                it_type = type(interrupt_item)
+                it_attrs = _public_attrs(it_type)
+                out.append(_INTERRUPT_HEADER.format(j, it_type))
+                if VERBOSE:
+                    out.append(f"  Interrupt attributes: {sorted(it_attrs)}")
 
                 # Try different ways to access payload
-                if hasattr(interrupt_item, 'value'):
-                    print(f"  Has .value: {interrupt_item.value}")
-                if hasattr(interrupt_item, 'data'):
-                    print(f"  Has .data: {interrupt_item.data}")
-                if hasattr(interrupt_item, 'payload'):
-                    print(f"  Has .payload: {interrupt_item.payload}")
+                for name in ('value', 'data', 'payload'):
+                    if name in it_attrs:
+                        out.append(f"  Has .{name}: {getattr(interrupt_item, name)}")
 
                 # Try to access as dict
                 if isinstance(interrupt_item, dict):
-                    print(f"  Is dict: {interrupt_item}")
+                    out.append(f"  Is dict: {interrupt_item}")
 
                 # Try to convert to dict
                 if hasattr(interrupt_item, '__dict__'):
-                    print(f"  __dict__: {interrupt_item.__dict__}")
+                    out.append(f"  __dict__: {interrupt_item.__dict__}")
         else:
-            print(f"Has interrupts: False")
+            out.append(f"Has interrupts: False")
 else:
-    print("\n⚠️ No tasks in state")
-
-print("\n" + "=" * 80)
-print("Values in state")
-print("=" * 80)
-if state.values:
-    print(f"State values keys: {state.values.keys()}")
-    if 'messages' in state.values:
-        print(f"Number of messages: {len(state.values['messages'])}")
-        for msg in state.values['messages']:
-            print(f"  - {msg.type}: {msg.content[:100] if hasattr(msg, 'content') else 'N/A'}")
+    out.append("\n⚠️ No tasks in state")
+
+out.append("\n" + "=" * 80)
+out.append("Values in state")
+out.append("=" * 80)
+vals = state.values or {}
+if vals:
+    out.append(f"State values keys: {list(vals)}")
+    messages = vals.get('messages')
+    if messages is not None:
+        out.append(f"Number of messages: {len(messages)}")
+        for msg in messages:
+            content = getattr(msg, 'content', None)
+            out.append(f"  - {msg.type}: {content[:100] if isinstance(content, str) else 'N/A'}")
+
+sys.stdout.write("\n".join(out) + "\n")